@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import numpy as np
+
+from bluff import FULL_COUNTS, RANKS, valid_bluff_plays_counts
+from zeroorderplayer import CHALLENGE_THRESHOLD, challenge_probability_table
+
+# Lockstep batch engine: plays many games at once as NumPy arrays, following the same rules as
+# BluffController.play. Only works for stateless policies (no observe_* callbacks), which
+# implement take_turns(states) and return one action per game. Hands are (players, 4, games) rank counts.
+
+HAND_SIGNATURES = 5 ** 4  # a hand holds 0-4 cards of each of the 4 ranks
+
+
+def hand_index(hands: np.ndarray) -> np.ndarray:
+    """Maps (4, n) rank-count columns to 0..624, the order of np.ndindex(5, 5, 5, 5)."""
+    a, j, q, k = hands.astype(np.int64)
+    return ((a * 5 + j) * 5 + q) * 5 + k
+
+
+class TurnStates:
+    """
+    The part of N game states a policy gets to see: the hands of the players to move, the index of
+    the current rank and the count of the last bid (-1 if there is no bid to challenge).
+    Arrays are rank-major: hands[r, g] is the number of rank-r cards in game g (reductions over
+    the 4 ranks are much cheaper along the first axis). Games that already finished may still
+    be present; their actions are ignored.
+    """
+
+    def __init__(self, hands: np.ndarray, current_rank: np.ndarray, bid_count: np.ndarray):
+        self.hands = hands
+        self.current_rank = current_rank
+        self.bid_count = bid_count
+
+    def __len__(self) -> int:
+        return self.hands.shape[1]
+
+    def rank_mask(self) -> np.ndarray:
+        """(4, n) boolean mask of the current rank."""
+        return self.current_rank == np.arange(len(RANKS))[:, None]
+
+
+class BatchPolicy:
+    def take_turns(self, states: TurnStates) -> np.ndarray:
+        """
+        Returns a (4, n) array with the rank counts each game plays; an all-zero column is a challenge.
+        """
+        return np.zeros_like(states.hands)
+
+
+class BatchRandomPolicy(BatchPolicy):
+    """
+    Batched RandomBluffPlayer: challenges 30% of the time, otherwise picks a play with the
+    physical-card weighting of valid_bluff_plays_counts (uniform over the actual cards).
+    """
+
+    def __init__(self, rng: np.random.Generator, challenge_rate: float = 0.3):
+        self.rng = rng
+        self.challenge_rate = challenge_rate
+        # The plays of all 5^4 hands laid out back to back, with one running total of their weights;
+        # hand h owns the slice of cumulative between start[h] and start[h] + total[h].
+        plays = []
+        weights = []
+        self.start = np.zeros(HAND_SIGNATURES)
+        self.total = np.zeros(HAND_SIGNATURES)
+        for h, hand in enumerate(np.ndindex(5, 5, 5, 5)):
+            hand_plays, hand_weights = valid_bluff_plays_counts(hand)
+            self.total[h] = sum(hand_weights)
+            if h + 1 < HAND_SIGNATURES:
+                self.start[h + 1] = self.start[h] + self.total[h]
+            plays.extend(hand_plays)
+            weights.extend(hand_weights)
+        self.plays = np.array(plays, dtype=np.int8).T
+        self.cumulative = np.cumsum(weights, dtype=float)
+
+    def take_turns(self, states: TurnStates) -> np.ndarray:
+        n = len(states)
+        h = hand_index(states.hands)
+        target = self.start[h] + self.rng.random(n) * self.total[h]
+        play = np.searchsorted(self.cumulative, target, side="right")
+        actions = self.plays[:, np.minimum(play, self.plays.shape[1] - 1)]
+        challenge = (states.bid_count >= 0) & (self.rng.random(n) < self.challenge_rate)
+        return actions * ~challenge
+
+
+class BatchZeroOrderPolicy(BatchPolicy):
+    """Batched ZeroOrderPlayer (see zeroorderplayer.tom0_action)."""
+
+    def __init__(self, deck_size: int = 16, rank_copies: int = 4):
+        self.table = np.array(challenge_probability_table(deck_size, rank_copies))
+
+    def take_turns(self, states: TurnStates) -> np.ndarray:
+        hands = states.hands
+        rank_mask = states.rank_mask()
+        truth = hands * rank_mask  # truthful: every card of the rank
+        bluff = hands * ~rank_mask  # bluff: every other card
+        hand_size = hands.sum(axis=0)
+        n_truth = truth.sum(axis=0)
+        n_bluff = hand_size - n_truth
+
+        bid = np.clip(states.bid_count, 0, self.table.shape[2] - 1)
+        p_bluff = self.table[hand_size, n_truth, bid]
+        challenge = (states.bid_count >= 0) & (p_bluff >= CHALLENGE_THRESHOLD)
+
+        want_to_bluff = ((n_truth < 3) & (n_bluff > 0)) | (n_truth == 0)
+        return np.where(want_to_bluff, bluff, truth) * ~challenge
+
+
+class BatchBluffController:
+    RANKS = RANKS
+    UNFINISHED = -1  # winner of a game that hit max_turns
+
+    def __init__(self):
+        self._policies: list[BatchPolicy] = []
+
+    def join(self, policy: BatchPolicy) -> None:
+        if policy not in self._policies:
+            self._policies.append(policy)
+
+    def _deal(self, number_of_games: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Shuffles number_of_games decks; returns hands as (players, 4, games) and the pile as (4, games).
+        """
+        player_count = len(self._policies)
+        deck = np.repeat(np.arange(len(self.RANKS)), FULL_COUNTS)
+        decks = deck[np.argsort(rng.random((number_of_games, len(deck))), axis=1)]
+        per_player = len(deck) // player_count
+        ranks = np.arange(len(self.RANKS))[:, None, None]
+
+        def count(cards: np.ndarray) -> np.ndarray:
+            return (cards[None] == ranks).sum(axis=2).astype(np.int8)
+
+        hands = np.stack([count(decks[:, p * per_player : (p + 1) * per_player]) for p in range(player_count)])
+        return np.ascontiguousarray(hands), np.ascontiguousarray(count(decks[:, player_count * per_player :]))
+
+    def play_batch(
+        self, number_of_games: int, *, seed: int | None = None, rng: np.random.Generator | None = None,
+        max_turns: int = 10_000,
+    ) -> np.ndarray:
+        """
+        Plays number_of_games games in lockstep and returns the winner of each game
+        (UNFINISHED for games still running after max_turns turns).
+        """
+        if rng is None:
+            rng = np.random.default_rng(seed)
+        player_count = len(self._policies)
+        hands, pile = self._deal(number_of_games, rng)
+        n = number_of_games
+        current_rank = np.zeros(n, dtype=np.int64)
+        last_action = np.zeros((4, n), dtype=np.int8)
+        bid_count = np.full(n, -1, dtype=np.int64)  # -1: no bid (last_bid is None)
+        game_ids = np.arange(n)  # original index of every column still in the arrays
+        alive = np.ones(n, dtype=bool)
+        winner = np.full(number_of_games, self.UNFINISHED, dtype=np.int64)
+        ranks = np.arange(len(self.RANKS))[:, None]
+
+        for turn in range(max_turns):
+            # Every turn (play or challenge) passes to the next player, and every game starts
+            # with player 0, so all games have the same player to move.
+            cp = turn % player_count
+            previous = (cp - 1) % player_count
+            hand = hands[cp]
+
+            # A player without cards at the start of their turn wins
+            empty = hand.sum(axis=0) == 0
+
+            actions = self._policies[cp].take_turns(TurnStates(hand, current_rank, bid_count))
+            challenge = ~actions.any(axis=0) & ~empty
+            playing = ~challenge & ~empty
+
+            # Challenges; challenging without a bid is illegal and ends the game, credited to the challenger (as in GameState.step)
+            illegal = challenge & (bid_count <= 0)
+            resolve = challenge & ~illegal
+            was_bluff = (last_action * (current_rank != ranks)).any(axis=0)
+            # Cheating (playing cards you don't hold) also means taking the pile
+            cheated = playing & ((actions < 0) | (actions > hand)).any(axis=0)
+            actions = actions * (playing & ~cheated)
+
+            hands[cp] += pile * ((resolve & ~was_bluff) | cheated) - actions
+            hands[previous] += pile * (resolve & was_bluff)
+            pile = pile * ~(resolve | cheated) + actions
+            last_action = np.where(playing, actions, last_action * ~resolve)
+            bid_count = np.where(playing, actions.sum(axis=0), np.where(resolve, -1, bid_count))
+            current_rank = (current_rank + resolve) % len(self.RANKS)
+
+            finished = alive & (empty | illegal)
+            if finished.any():
+                winner[game_ids[finished]] = cp
+                alive &= ~finished
+                if not alive.any():
+                    break
+                # Finished columns keep running harmlessly until enough of them pile up to be worth dropping
+                if alive.sum() * 4 < 3 * len(alive):
+                    hands, pile, last_action = hands[:, :, alive], pile[:, alive], last_action[:, alive]
+                    bid_count, current_rank, game_ids = bid_count[alive], current_rank[alive], game_ids[alive]
+                    alive = alive[alive]
+        return winner
+
+    def repeated_games(
+        self,
+        number_of_games: int,
+        *,
+        win_score: int = 1,
+        seed: int | None = None,
+        batch_size: int = 100_000,
+    ) -> list[int]:
+        """
+        Same result format as BluffController.repeated_games. Unfinished games score for nobody.
+        """
+        rng = np.random.default_rng(seed)
+        total_score = np.zeros(len(self._policies), dtype=np.int64)
+        for start in range(0, number_of_games, batch_size):
+            winners = self.play_batch(min(batch_size, number_of_games - start), rng=rng)
+            total_score += np.bincount(winners[winners >= 0], minlength=len(self._policies))
+        return [int(score) * win_score for score in total_score]
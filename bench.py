@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+from statistics import mean, quantiles
+
+from bluff import BluffController, BluffBid, BluffPlayer, get_valid_bluff_plays
+from randomplayer import RandomBluffPlayer
+from tournament import DEFAULT_AGENTS, agent_name
+from zeroorderplayer import ZeroOrderPlayer
+
+# Benchmark suite for the engine and the agents' hot paths. Every measurement uses a fixed seed,
+# so two runs on the same machine play exactly the same games.
+#
+#   python bench.py                                   # writes bench_results.json
+#   python bench.py --save-baseline bench_baseline.json
+#   python bench.py --baseline bench_baseline.json    # exits with 1 if anything got slower
+#
+# Results are a flat {name: {"value", "unit", "better"}} mapping so runs can be diffed key by key.
+
+SEED = 20240601
+CALLBACKS = ("take_turn", "observe_bid", "observe_challenge")
+
+# ZeroOrderPlayer against either SecondOrderPlayer can repeat the same moves forever; those games
+# are aborted after MAX_TURNS turns (well above the longest finished games, ~3000 turns) and still
+# count towards games/sec.
+MAX_TURNS = 5000
+
+
+def result(value: float, unit: str, better: str = "lower") -> dict:
+    return {"value": value, "unit": unit, "better": better}
+
+
+def bench_pairings(games: int, agents: list[type[BluffPlayer]]) -> dict:
+    """Games per second of every pairing of distinct agents (agent listed first in seat 0)."""
+    results = {}
+    for i, first in enumerate(agents):
+        for second in agents[i + 1 :]:
+            controller = BluffController(max_turns=MAX_TURNS)
+            controller.join(first())
+            controller.join(second())
+            start = time.perf_counter()
+            for _ in controller.iter_games(games, seed=SEED):
+                pass
+            elapsed = time.perf_counter() - start
+            name = f"games_per_sec/{agent_name(first)}-vs-{agent_name(second)}"
+            results[name] = result(games / elapsed, "games/s", "higher")
+    return results
+
+
+def timed_agent(agent: type[BluffPlayer], samples: dict[str, list[int]]) -> BluffPlayer:
+    """
+    An instance of `agent` that records the duration (ns) of every callback in samples.
+    The controller calls the *_counts entry points, so those are what get timed; for agents
+    that only implement the card API this includes the conversion, as it does in a real game.
+    """
+
+    class Timed(agent):
+        def take_turn_counts(self, *args):
+            start = time.perf_counter_ns()
+            action = super().take_turn_counts(*args)
+            samples["take_turn"].append(time.perf_counter_ns() - start)
+            return action
+
+        def observe_bid_counts(self, *args):
+            start = time.perf_counter_ns()
+            super().observe_bid_counts(*args)
+            samples["observe_bid"].append(time.perf_counter_ns() - start)
+
+        def observe_challenge_counts(self, *args):
+            start = time.perf_counter_ns()
+            super().observe_challenge_counts(*args)
+            samples["observe_challenge"].append(time.perf_counter_ns() - start)
+
+    return Timed()
+
+
+def bench_latencies(games: int, agents: list[type[BluffPlayer]]) -> dict:
+    """
+    Per-call latency distribution of every callback of every agent, measured over `games`
+    games against RandomBluffPlayer (which keeps games short and reaches every branch).
+    """
+    results = {}
+    for agent in agents:
+        samples = {callback: [] for callback in CALLBACKS}
+        controller = BluffController()
+        controller.join(timed_agent(agent, samples))
+        controller.join(RandomBluffPlayer())
+        for _ in controller.iter_games(games, seed=SEED):
+            pass
+        for callback, durations in samples.items():
+            if len(durations) < 2:
+                continue
+            p50, p90, p99 = (quantiles(durations, n=100)[q - 1] / 1000 for q in (50, 90, 99))
+            prefix = f"latency/{agent_name(agent)}/{callback}"
+            results[f"{prefix}/mean"] = result(mean(durations) / 1000, "us")
+            results[f"{prefix}/p50"] = result(p50, "us")
+            results[f"{prefix}/p90"] = result(p90, "us")
+            results[f"{prefix}/p99"] = result(p99, "us")
+            results[f"{prefix}/calls"] = result(len(durations), "calls", "none")
+    return results
+
+
+def random_positions(count: int) -> list[tuple[tuple[str, ...], str, BluffBid | None]]:
+    """Fixed sample of (hand, current rank, last bid) positions for the micro-benchmarks."""
+    rng = random.Random(SEED)
+    deck = [rank for rank in BluffController.RANKS for _ in range(4)]
+    positions = []
+    for _ in range(count):
+        hand = tuple(rng.sample(deck, rng.randint(1, 12)))
+        rank = rng.choice(BluffController.RANKS)
+        bid = BluffBid(rng.randint(1, 4), rank, 1) if rng.random() < 0.8 else None
+        positions.append((hand, rank, bid))
+    return positions
+
+
+def per_call_ns(function, calls: int, repeat: int = 5) -> float:
+    """Best-of-`repeat` time per call of function() (which makes `calls` calls), in ns."""
+    return min(timeit.repeat(function, number=1, repeat=repeat)) / calls * 1e9
+
+
+def bench_micro(positions: int) -> dict:
+    sample = random_positions(positions)
+    player = ZeroOrderPlayer()
+
+    def valid_plays():
+        for hand, _, bid in sample:
+            get_valid_bluff_plays(hand, bid)
+
+    def challenge_probability():
+        for hand, rank, bid in sample:
+            player.calculate_challenge_probability(hand, 2, rank, bid)
+
+    return {
+        "micro/get_valid_bluff_plays": result(per_call_ns(valid_plays, positions), "ns"),
+        "micro/calculate_challenge_probability": result(per_call_ns(challenge_probability, positions), "ns"),
+    }
+
+
+def run(games: int = 200, latency_games: int = 200, positions: int = 2000) -> dict:
+    agents = list(DEFAULT_AGENTS)
+    results = {}
+    results.update(bench_micro(positions))
+    results.update(bench_latencies(latency_games, agents))
+    results.update(bench_pairings(games, agents))
+    return {
+        "meta": {
+            "seed": SEED,
+            "games": games,
+            "latency_games": latency_games,
+            "positions": positions,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2) -> list[str]:
+    """
+    Returns the names of results that are more than `tolerance` (relative) worse than the baseline,
+    and prints the change of every result both runs have.
+    """
+    regressions = []
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None or new["better"] == "none" or not old["value"]:
+            continue
+        change = new["value"] / old["value"] - 1
+        worse = change > tolerance if new["better"] == "lower" else change < -tolerance
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:<90} {old['value']:>12.2f} -> {new['value']:>12.2f} {new['unit']:<8} {change:+7.1%}{flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks for the Bluff engine and agents.")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the results (JSON)")
+    parser.add_argument("--baseline", help="compare against this earlier results file")
+    parser.add_argument("--save-baseline", help="also write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative slowdown that counts as a regression")
+    parser.add_argument("--games", type=int, default=200, help="games per pairing")
+    parser.add_argument("--latency-games", type=int, default=200, help="games per agent for the latency runs")
+    parser.add_argument("--positions", type=int, default=2000, help="positions per micro-benchmark")
+    args = parser.parse_args(argv)
+
+    current = run(args.games, args.latency_games, args.positions)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+    if args.baseline is None:
+        for name, entry in current["results"].items():
+            print(f"{name:<90} {entry['value']:>12.2f} {entry['unit']}")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.tolerance)
+    print(f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
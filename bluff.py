@@ -1,6 +1,90 @@
 import itertools
+import os
 import random
+import time
+from collections import Counter
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from math import comb
 
+from events import AbortEvent, ChallengeEvent, CheatEvent, DealEvent, EventSink, PlayEvent, TextSink, WinEvent
+
+RANKS = "AJQK"
+RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+FULL_COUNTS = (4, 4, 4, 4)  # 4 cards of every rank in the deck
+
+# Compact hand/pile encoding: the number of cards of each rank, in RANKS order.
+# ("A", "K", "A") becomes (2, 0, 0, 1).
+Counts = tuple[int, ...]
+
+
+def cards_to_counts(cards) -> Counts:
+    counts = [0, 0, 0, 0]
+    for card in cards:
+        counts[RANK_INDEX[card]] += 1
+    return tuple(counts)
+
+
+@lru_cache(maxsize=None)
+def counts_to_cards(counts: Counts) -> tuple[str, ...]:
+    """
+    Expands a rank-count tuple back into (sorted) cards. Only 5^4 hands exist, so this is cached.
+    """
+    return tuple(rank for rank, n in zip(RANKS, counts) for _ in range(n))
+
+
+def sample_counts(counts: Counts, k: int, rng: random.Random = random) -> Counts:
+    """
+    Draws k cards uniformly without replacement from the cards described by `counts`
+    (the rank-count equivalent of rng.sample(cards, k)).
+    """
+    remaining = list(counts)
+    total = sum(remaining)
+    drawn = [0, 0, 0, 0]
+    for _ in range(min(k, total)):
+        x = rng.randrange(total)
+        for r in range(4):
+            if x < remaining[r]:
+                break
+            x -= remaining[r]
+        remaining[r] -= 1
+        drawn[r] += 1
+        total -= 1
+    return tuple(drawn)
+
+
+MASK64 = (1 << 64) - 1
+
+
+def game_seed(run_seed: int, index: int) -> int:
+    """
+    Seed of game `index` of a run seeded with run_seed (one SplitMix64 step). Game i of a run
+    only depends on (run_seed, i), so any shard or worker can play it and get the same result.
+    """
+    z = (run_seed + (index + 1) * 0x9E3779B97F4A7C15) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+@lru_cache(maxsize=1 << 12)
+def hand_distribution(pool: Counts, hand_size: int) -> tuple[tuple[Counts, float], ...]:
+    """
+    Every distinct hand (as rank counts) of hand_size cards drawn without replacement from `pool`,
+    with its multivariate-hypergeometric probability. This is the exact distribution of
+    cards_to_counts(random.sample(pool_cards, hand_size)).
+    """
+    hand_size = min(hand_size, sum(pool))
+    total = comb(sum(pool), hand_size)
+    outcomes = []
+    for hand in itertools.product(*(range(min(n, hand_size) + 1) for n in pool)):
+        if sum(hand) == hand_size:
+            weight = 1
+            for n, m in zip(pool, hand):
+                weight *= comb(n, m)
+            outcomes.append((hand, weight / total))
+    return tuple(outcomes)
 
 class BluffBid:
     """
@@ -28,7 +112,191 @@ class BluffBid:
         )
 
 
+class GameRecord:
+    """
+    Summary of one finished game: the winning seat, the number of turns taken, how many of those
+    turns were challenges and how many plays were bluffs, and the seed the game was played with
+    (None if it was not seeded). A game the controller aborted has winner None and the reason in `aborted`.
+    `seats` is the order the joined players sat in (None: join order), see BluffController.play_game.
+    """
+
+    # Reasons for aborting a game (see BluffController)
+    MAX_TURNS = "max turns"
+    REPEATED_STATE = "repeated state"
+    TIME_LIMIT = "time limit"
+
+    def __init__(
+        self,
+        winner: int | None,
+        turns: int,
+        challenges: int,
+        bluffs: int,
+        seed: int | None = None,
+        aborted: str | None = None,
+    ):
+        self.winner = winner
+        self.turns = turns
+        self.challenges = challenges
+        self.bluffs = bluffs
+        self.seed = seed
+        self.aborted = aborted
+        self.seats: tuple[int, ...] | None = None
+
+    @property
+    def winning_player(self) -> int | None:
+        """The winner as an index into the controller's joined players rather than a seat."""
+        if self.winner is None or self.seats is None:
+            return self.winner
+        return self.seats[self.winner]
+
+    def __str__(self) -> str:
+        outcome = f"aborted ({self.aborted})" if self.aborted else f"winner {self.winner}"
+        return (
+            f"{outcome} after {self.turns} turns "
+            f"({self.challenges} challenges, {self.bluffs} bluffs, seed {self.seed})"
+        )
+
+
+class GameState:
+    """
+    Everything that changes during a game: rank-count hands and pile, whose turn it is, the rank
+    index being called, the last play (and its bid) and the turn counters. step() applies one
+    action with the rules of BluffController; copy() is a cheap fork (a few small lists), so
+    search agents can play games forward from any position. The controller runs on this class too.
+    """
+
+    __slots__ = (
+        "hands", "pile", "current_player", "current_rank", "last_action", "last_bid",
+        "turns", "challenges", "bluffs", "winner",
+    )
+
+    # What step() did
+    PLAY = 0
+    CHEAT = 1  # played cards the player does not hold; the player takes the pile instead
+    CHALLENGE = 2
+    ILLEGAL_CHALLENGE = 3  # a challenge with nothing to challenge; ends the game, credited to the challenger
+
+    def __init__(
+        self,
+        hands: list[list[int]],
+        pile: list[int],
+        *,
+        current_player: int = 0,
+        current_rank: int = 0,
+        last_action: Counts = (0, 0, 0, 0),
+        last_bid: BluffBid | None = None,
+    ):
+        self.hands = hands
+        self.pile = pile
+        self.current_player = current_player
+        self.current_rank = current_rank
+        self.last_action = last_action
+        self.last_bid = last_bid
+        self.turns = 0
+        self.challenges = 0
+        self.bluffs = 0
+        self.winner: int | None = None
+        if not any(hands[current_player]):
+            self.winner = current_player
+
+    def copy(self) -> "GameState":
+        state = GameState.__new__(GameState)
+        state.hands = [hand[:] for hand in self.hands]
+        state.pile = self.pile[:]
+        state.current_player = self.current_player
+        state.current_rank = self.current_rank
+        state.last_action = self.last_action  # tuples and bids are never mutated, so they can be shared
+        state.last_bid = self.last_bid
+        state.turns = self.turns
+        state.challenges = self.challenges
+        state.bluffs = self.bluffs
+        state.winner = self.winner
+        return state
+
+    def position(self) -> tuple:
+        """Hashable key of the position (not the counters), as used for BluffController.repetition_limit."""
+        return (self.current_player, self.current_rank, tuple(self.last_action), tuple(self.pile), *map(tuple, self.hands))
+
+    def actions(self) -> list[Counts | None]:
+        """
+        The moves a search should consider for the player to move: every distinct play of up to
+        MAX_PLAY cards and, if there is a play to challenge, None. (The rules allow bigger plays.)
+        """
+        if self.winner is not None:
+            return []
+        actions: list[Counts | None] = list(valid_bluff_plays_counts(tuple(self.hands[self.current_player]))[0])
+        if any(self.last_action):
+            actions.append(None)
+        return actions
+
+    def step(self, action) -> tuple[int, bool, int | None]:
+        """
+        Plays `action` (rank counts, or None / no cards to challenge) for the player to move.
+        Returns (what happened, bluff, taker): for a play whether it was a bluff, for a challenge
+        whether the challenged play was one and which player took the pile.
+        """
+        player = self.current_player
+        player_count = len(self.hands)
+        hand = self.hands[player]
+        pile = self.pile
+        self.turns += 1
+        if action is None or not any(action):
+            self.challenges += 1
+            last_action = self.last_action
+            if not any(last_action):
+                # Illegal challenge. The game ends and, as the original controller has always done
+                # (it returned current_player), the challenger is credited with the win
+                self.winner = player
+                return GameState.ILLEGAL_CHALLENGE, False, None
+            current_rank = self.current_rank
+            was_bluff = sum(last_action) != last_action[current_rank]  # any card of another rank
+            taker = (player_count + player - 1) % player_count if was_bluff else player
+            taker_hand = self.hands[taker]
+            for r in range(4):
+                taker_hand[r] += pile[r]
+            self.pile = [0, 0, 0, 0]
+            # Next round: next player, next rank
+            self.current_player = (player + 1) % player_count
+            self.current_rank = (current_rank + 1) % 4
+            self.last_bid = None
+            self.last_action = (0, 0, 0, 0)
+            outcome = GameState.CHALLENGE, was_bluff, taker
+        else:
+            if len(action) != 4 or not (
+                0 <= action[0] <= hand[0] and 0 <= action[1] <= hand[1] and 0 <= action[2] <= hand[2] and 0 <= action[3] <= hand[3]
+            ):
+                # Played cards the player does not hold: takes the pile instead
+                for r in range(4):
+                    hand[r] += pile[r]
+                self.pile = [0, 0, 0, 0]
+                action = (0, 0, 0, 0)
+                what = GameState.CHEAT
+            else:
+                for r in range(4):
+                    hand[r] -= action[r]
+                    pile[r] += action[r]
+                what = GameState.PLAY
+            current_rank = self.current_rank
+            bluffed = sum(action) != action[current_rank]
+            if bluffed:
+                self.bluffs += 1
+            self.last_action = action if type(action) is tuple else tuple(action)
+            self.last_bid = BluffBid(sum(action), RANKS[current_rank], player)
+            self.current_player = (player + 1) % player_count
+            outcome = what, bluffed, None
+        # A player who has run out of cards when their turn comes has won
+        if not any(self.hands[self.current_player]):
+            self.winner = self.current_player
+        return outcome
+
+
 class BluffPlayer:
+    # Source of every random choice the agent makes. The controller gives each seat of every game
+    # its own random.Random before start_game; outside a controller it is the global module.
+    rng: random.Random = random  # type: ignore
+    # True if the agent never uses rng, so a deal fully determines its games (see dealeval.py)
+    deterministic = False
+
     def start_game(self, identifier: int, cards: tuple[str]):
         self.identifier = identifier
         self.played_by_me = {r: 0 for r in "AJQK"}  #For explicit memory
@@ -64,19 +332,180 @@ class BluffPlayer:
     ) -> None:
         pass
 
+    # Rank-count API. The controller only calls these; hands are passed as Counts tuples and
+    # take_turn_counts returns the Counts of the cards played (or None to challenge).
+    # The defaults translate to the card API above, so an agent only overrides them to skip the conversion.
+    def start_game_counts(self, identifier: int, counts: Counts) -> None:
+        self.start_game(identifier, counts_to_cards(counts))
+
+    def take_turn_counts(
+        self,
+        counts: Counts,
+        player_count: int,
+        current_rank: str,
+        current_bid: BluffBid | None
+    ) -> Counts | None:
+        action = self.take_turn(counts_to_cards(counts), player_count, current_rank, current_bid)
+        if action is None:
+            return None
+        return cards_to_counts(action)
+
+    def observe_bid_counts(
+        self,
+        counts: Counts,
+        player_count: int,
+        challenge_amount_of_cards: int,
+        current_rank: str,
+        bidder_id: int,
+        current_bid
+    ) -> None:
+        self.observe_bid(
+            counts_to_cards(counts), player_count, challenge_amount_of_cards, current_rank, bidder_id, current_bid
+        )
+
+    def observe_challenge_counts(
+        self,
+        counts: Counts,
+        player_count: int,
+        challenge_amount_of_cards: int,
+        current_rank: str,
+        challenger_id: int,
+        success: bool,
+    ) -> None:
+        self.observe_challenge(
+            counts_to_cards(counts), player_count, challenge_amount_of_cards, current_rank, challenger_id, success
+        )
+
+
+CALLBACKS = ("start_game", "take_turn", "observe_bid", "observe_challenge")
+
+
+class ControllerProfile:
+    """
+    Timing data collected by BluffController.enable_profiling: per seat and per callback the number
+    of calls and their total wall time (seconds), the turn count of every game, and the total
+    wall time of all games. What is left after subtracting the callbacks is the controller's own overhead.
+    """
+
+    def __init__(self, player_count: int):
+        self.calls = [{callback: 0 for callback in CALLBACKS} for _ in range(player_count)]
+        self.seconds = [{callback: 0.0 for callback in CALLBACKS} for _ in range(player_count)]
+        self.game_turns: list[int] = []
+        self.game_seconds = 0.0
+
+    @property
+    def games(self) -> int:
+        return len(self.game_turns)
+
+    @property
+    def callback_seconds(self) -> float:
+        return sum(sum(seat.values()) for seat in self.seconds)
+
+    @property
+    def overhead_seconds(self) -> float:
+        return self.game_seconds - self.callback_seconds
+
+    def share(self, seat: int, callback: str) -> float:
+        """Fraction of the total game time spent in one callback of one seat."""
+        return self.seconds[seat][callback] / self.game_seconds if self.game_seconds else 0.0
+
+    def merge(self, other: "ControllerProfile") -> None:
+        for mine, theirs in zip(self.calls, other.calls):
+            for callback in CALLBACKS:
+                mine[callback] += theirs[callback]
+        for mine, theirs in zip(self.seconds, other.seconds):
+            for callback in CALLBACKS:
+                mine[callback] += theirs[callback]
+        self.game_turns.extend(other.game_turns)
+        self.game_seconds += other.game_seconds
+
+    def __str__(self) -> str:
+        lines = [f"{self.games} games, {sum(self.game_turns)} turns, {self.game_seconds:.3f}s"]
+        for seat in range(len(self.calls)):
+            for callback in CALLBACKS:
+                calls = self.calls[seat][callback]
+                if calls:
+                    seconds = self.seconds[seat][callback]
+                    lines.append(
+                        f"  seat {seat} {callback:<18} {calls:>9} calls {seconds:>9.3f}s "
+                        f"{self.share(seat, callback):>6.1%}  {seconds / calls * 1e6:>9.2f}us/call"
+                    )
+        overhead = self.overhead_seconds / self.game_seconds if self.game_seconds else 0.0
+        lines.append(f"  controller overhead {self.overhead_seconds:.3f}s {overhead:.1%}")
+        return "\n".join(lines)
+
+
+class _TimedPlayer:
+    """
+    Stands in for a player during a profiled game: forwards the callbacks the controller makes
+    and adds their wall time to the profile. Unprofiled games use the players directly.
+    """
+
+    def __init__(self, player: "BluffPlayer", seat: int, profile: ControllerProfile):
+        self.player = player
+        self.calls = profile.calls[seat]
+        self.seconds = profile.seconds[seat]
+
+    def _timed(self, callback: str, method, args):
+        start = time.perf_counter()
+        result = method(*args)
+        self.seconds[callback] += time.perf_counter() - start
+        self.calls[callback] += 1
+        return result
+
+    def start_game_counts(self, *args) -> None:
+        self._timed("start_game", self.player.start_game_counts, args)
+
+    def take_turn_counts(self, *args) -> Counts | None:
+        return self._timed("take_turn", self.player.take_turn_counts, args)
+
+    def observe_bid_counts(self, *args) -> None:
+        self._timed("observe_bid", self.player.observe_bid_counts, args)
+
+    def observe_challenge_counts(self, *args) -> None:
+        self._timed("observe_challenge", self.player.observe_challenge_counts, args)
+
 
 class BluffController:
-    RANKS = "AJQK"
-    def __init__(self):
+    RANKS = RANKS
+    def __init__(
+        self,
+        rng: random.Random | None = None,
+        *,
+        max_turns: int | None = 10_000,
+        repetition_limit: int | None = None,
+        time_limit: float | None = None,
+    ):
+        """
+        Games that run too long are aborted (GameRecord.aborted, no winner) after max_turns turns,
+        when the same position (hands, pile, rank, player to move and last play) comes up for the
+        repetition_limit-th time, or after time_limit seconds of wall time. None disables a limit.
+        Aborted games score for nobody and are counted per reason in self.aborted.
+        """
         self._players = []
+        self.rng = rng  # draws the seeds of unseeded games; None uses the global random module
+        self.max_turns = max_turns
+        self.repetition_limit = repetition_limit
+        self.time_limit = time_limit
+        self.profile: ControllerProfile | None = None  # set by enable_profiling
+        self.sink: EventSink | None = None  # receives the events of every game (see events.py)
+        self.games_played = 0
+        self.aborted: Counter[str] = Counter()
+
+    def __getstate__(self):
+        # Open files and streams don't pickle, so worker processes get no sink (repeated_games refuses
+        # to run in parallel while one is attached, rather than drop its events)
+        state = self.__dict__.copy()
+        state["sink"] = None
+        return state
 
     def join(self, player: BluffPlayer) -> None:
         if player not in self._players:
             self._players.append(player)
 
-    def _shuffle_and_divide(self) -> tuple[list[list[str]], list[str]]:
+    def _shuffle_and_divide(self, rng: random.Random = random) -> tuple[list[list[str]], list[str]]:
         deck = [card for card in self.RANKS for _ in range(4)]
-        random.shuffle(deck)
+        rng.shuffle(deck)
         hands = [[] for _ in self._players]
         number_of_cards_per_player = len(deck) // len(self._players)
         for player in range(len(self._players)):
@@ -84,152 +513,349 @@ class BluffController:
             deck = deck[number_of_cards_per_player:]
         return hands, deck
 
-    def play(self, *, debug=False) -> int:
-        hands, pile = self._shuffle_and_divide()
-        for i, player in enumerate(self._players):
-            player.start_game(i, tuple(hands[i]))  # Start game signal
-        current_rank = 0
-        current_player = 0
-        winner = None
-        last_action: list[str] = []
-        last_bid: BluffBid | None = None   # <-- initialize here
-        while (
-            winner is None
-        ):  # Changed from while not winner because 0 equals not winner and would throw bug.
-            if debug:
-                for player in range(len(self._players)):
-                    print("Player", player, "has hand", sorted(hands[player]))
-                print("Pile currently has", pile)
-                print("Current rank is", self.RANKS[current_rank])
-            if len(hands[current_player]) == 0:
-                winner = current_player
-                break
-            current_action = self._players[current_player].take_turn(
-                tuple(hands[current_player]),
-                len(self._players),
+    def _deal(self, rng: random.Random = random) -> tuple[list[list[int]], list[int]]:
+        """
+        Same deal as _shuffle_and_divide, but as mutable rank-count lists.
+        """
+        hands, deck = self._shuffle_and_divide(rng)
+        return [list(cards_to_counts(hand)) for hand in hands], list(cards_to_counts(deck))
+
+    def enable_profiling(self) -> ControllerProfile:
+        """
+        Starts recording callback timings, call counts and turn counts for every following game
+        (including the shards of a parallel repeated_games). Returns the profile, also available
+        as self.profile. When profiling is off the only cost is one attribute check per game.
+        """
+        self.profile = ControllerProfile(len(self._players))
+        return self.profile
+
+    def disable_profiling(self) -> ControllerProfile | None:
+        profile, self.profile = self.profile, None
+        return profile
+
+    def play(self, *, debug=False) -> int | None:
+        """The winning seat of one game, or None if the game was aborted (max_turns and the other limits)."""
+        return self.play_game(debug=debug).winner
+
+    def play_game(
+        self,
+        *,
+        debug=False,
+        seed: int | None = None,
+        deal: tuple[tuple[Counts, ...], Counts] | None = None,
+        seats: Sequence[int] | None = None,
+    ) -> "GameRecord":
+        """
+        Plays one game and returns its GameRecord. Everything random follows from the seed: the
+        deal comes from random.Random(seed) and the player in seat i gets random.Random(game_seed(seed, i))
+        as its rng, so play_game(seed=record.seed) replays the game. Without a seed one is drawn from self.rng.
+        deal=(hands, pile) as rank counts skips the shuffle and plays that deal instead
+        (the seed then only drives the players).
+        seats[i] is the joined player that sits in seat i (seat 0 moves first). The deal and the
+        random streams belong to the seats, so the same seed with other seats hands the same
+        hands, and the same stream of draws, to other players (see iter_paired_games). Each seat
+        has a stream of its own, so one player drawing more or less does not shift the other's draws.
+        Events go to self.sink; debug=True without a sink writes them to stdout as text.
+        """
+        if seed is None:
+            seed = (self.rng or random).getrandbits(64)
+        rng = random.Random(seed)
+        players = self._players if seats is None else [self._players[i] for i in seats]
+        for seat, player in enumerate(players):
+            player.rng = random.Random(game_seed(seed, seat))
+        sink = self.sink
+        if debug and sink is None:
+            sink = TextSink()
+        profile = self.profile
+        if profile is None:
+            record = self._play_game(players, sink, seed, rng, deal, seats)
+        else:
+            start = time.perf_counter()
+            record = self._play_game(
+                [_TimedPlayer(player, seat, profile) for seat, player in enumerate(players)], sink, seed, rng, deal, seats
+            )
+            profile.game_seconds += time.perf_counter() - start
+            profile.game_turns.append(record.turns)
+        if seats is not None:
+            record.seats = tuple(seats)
+        if record.aborted:
+            self.aborted[record.aborted] += 1
+        if debug:
+            sink.flush()
+        return record
+
+    def _play_game(
+        self,
+        players: list,
+        sink: EventSink | None,
+        seed: int,
+        rng: random.Random,
+        deal: tuple[tuple[Counts, ...], Counts] | None = None,
+        seats: Sequence[int] | None = None,
+    ) -> "GameRecord":
+        game = self.games_played
+        self.games_played += 1
+        if deal is None:
+            hands, pile = self._deal(rng)
+        else:
+            hands, pile = [list(hand) for hand in deal[0]], list(deal[1])
+        player_count = len(players)
+        if sink is not None:
+            sink.emit(DealEvent(
+                game,
+                seed,
+                tuple(tuple(hand) for hand in hands),
+                tuple(pile),
+                tuple(seats) if seats is not None else None,
+                deal is not None,
+            ))
+        for i, player in enumerate(players):
+            player.start_game_counts(i, tuple(hands[i]))  # Start game signal
+        state = GameState(hands, pile)
+        aborted = None
+        max_turns = self.max_turns if self.max_turns is not None else float("inf")
+        positions: dict | None = {} if self.repetition_limit is not None else None
+        deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        while state.winner is None:
+            if state.turns >= max_turns:
+                aborted = GameRecord.MAX_TURNS
+            elif positions is not None:
+                position = state.position()
+                seen = positions.get(position, 0) + 1
+                positions[position] = seen
+                if seen >= self.repetition_limit:
+                    aborted = GameRecord.REPEATED_STATE
+            if deadline is not None and aborted is None and time.perf_counter() > deadline:
+                aborted = GameRecord.TIME_LIMIT
+            if aborted is not None:
+                if sink is not None:
+                    sink.emit(AbortEvent(game, state.turns, aborted))
+                return GameRecord(None, state.turns, state.challenges, state.bluffs, seed, aborted)
+            current_player = state.current_player
+            current_rank = state.current_rank
+            current_action = players[current_player].take_turn_counts(
+                tuple(state.hands[current_player]),
+                player_count,
                 self.RANKS[current_rank],
-                last_bid
+                state.last_bid
             )
-            if current_action is None or len(current_action) == 0:
-                if len(last_action) == 0:
-                    # Player has performed an illegal action, next player wins the game
-                    if debug:
-                        print(
-                            "Player", current_player, "performed an illegal challenge."
-                        )
-                    winner = (current_player + 1) % len(self._players)
-                    break
-                last_action_was_a_bluff = False
-                for card in last_action:
-                    if card != self.RANKS[current_rank]:
-                        last_action_was_a_bluff = True
-                if not last_action_was_a_bluff:
-                    if debug:
-                        print(
-                            "Player",
-                            current_player,
-                            "challenged unsuccessfully and takes the entire pile.",
-                        )
-                    hands[current_player].extend(pile)
-                    pile = []
-                else:
-                    challenged_player = (len(self._players) + current_player - 1) % len(
-                        self._players
+            pile_before = tuple(state.pile) if sink is not None else None
+            what, bluff, taker = state.step(current_action)
+            if what == GameState.ILLEGAL_CHALLENGE:
+                if sink is not None:
+                    sink.emit(WinEvent(game, state.turns, state.winner, WinEvent.ILLEGAL_CHALLENGE))
+                break
+            if what == GameState.CHALLENGE:
+                if sink is not None:
+                    sink.emit(ChallengeEvent(game, state.turns, current_player, current_rank, bluff, taker, pile_before))
+                for player in range(player_count):
+                    players[player].observe_challenge_counts(
+                        tuple(state.hands[player]),
+                        player_count,
+                        0,  # len(last_action), which was just reset
+                        state.current_rank,
+                        state.current_player,
+                        bluff,
                     )
-                    if debug:
-                        print(
-                            "Player",
-                            current_player,
-                            "challenged successfully; player",
-                            challenged_player,
-                            "takes the entire pile.",
-                        )
-                    hands[challenged_player].extend(pile)
-                    pile = []
-                # Next round: next player, next rank
-                current_player = (current_player + 1) % len(
-                    self._players
-                )  # chatgpt says there is a bug here
-                current_rank = (current_rank + 1) % len(self.RANKS)
-                last_bid = None
-                last_action = []
-                for player in range(len(self._players)):
-                    self._players[player].observe_challenge(
-                        hands[player],
-                        len(self._players),
-                        len(last_action),
-                        current_rank,
-                        current_player,
-                        last_action_was_a_bluff,
-                    )  # till here
             else:
-                for card in current_action:
-                    if card in hands[current_player]:
-                        hands[current_player].remove(card)
-                        pile.append(card)
-                    else:
-                        if debug:
-                            print(
-                                "Player",
-                                current_player,
-                                "cheated and takes the entire pile.",
-                            )
-                        hands[current_player].extend(pile)
-                        pile = []
-                        current_action = []
-                        break
-                if debug:
-                    print(
-                        "Player",
-                        current_player,
-                        "plays",
-                        current_action,
-                        "onto the pile.",
-                    )
-                last_action = current_action
-                last_bid = BluffBid(len(last_action), self.RANKS[current_rank], current_player)
-                for player in range(
-                    len(self._players)
-                ):  # Chatgpt says theres an error from here
-                    self._players[player].observe_bid(
-                        hands[player],
-                        len(self._players),
-                        len(last_action),
+                if sink is not None:
+                    if what == GameState.CHEAT:
+                        sink.emit(CheatEvent(game, state.turns, current_player, tuple(current_action), pile_before))
+                    sink.emit(PlayEvent(game, state.turns, current_player, current_rank, state.last_action, bluff))
+                last_bid = state.last_bid
+                for player in range(player_count):
+                    players[player].observe_bid_counts(
+                        tuple(state.hands[player]),
+                        player_count,
+                        last_bid.count,
                         current_rank,
                         current_player,
-                        last_bid    #This is a change, I, Jesse added. It might be a mistake. 
-                    )  # Till here
-                current_player = (current_player + 1) % len(self._players)
-        if debug:
-            print("Player", current_player, "wins the game.")
-        return current_player
+                        last_bid    #This is a change, I, Jesse added. It might be a mistake.
+                    )
+        else:
+            if sink is not None:
+                sink.emit(WinEvent(game, state.turns, state.winner, WinEvent.EMPTY_HAND))
+        return GameRecord(state.winner, state.turns, state.challenges, state.bluffs, seed)
+
+    def iter_games(self, number_of_games: int | None = None, *, seed: int | None = None):
+        """
+        Streaming form of repeated_games: yields a GameRecord as soon as each game ends.
+        Game i is played with seed game_seed(seed, i), so the same seed gives the same games as
+        repeated_games, and any single game can be replayed with play_game(seed=record.seed).
+        With number_of_games=None it runs until the caller stops iterating.
+        """
+        run_seed = seed if seed is not None else (self.rng or random).getrandbits(64)
+        played = 0
+        while number_of_games is None or played < number_of_games:
+            yield self.play_game(seed=game_seed(run_seed, played))
+            played += 1
+
+    def rotations(self) -> list[list[int]]:
+        """The seatings of a paired deal: rotation k puts joined player (i + k) % n in seat i."""
+        n = len(self._players)
+        return [[(seat + k) % n for seat in range(n)] for k in range(n)]
+
+    def play_rotated(self, seed: int) -> tuple["GameRecord", ...]:
+        """
+        Plays the deal of `seed` once per seat rotation (a mirrored pair for two players). Every
+        player gets every seat and every hand of the deal, each time with the random stream of its seat.
+        """
+        return tuple(self.play_game(seed=seed, seats=seats) for seats in self.rotations())
+
+    def iter_paired_games(self, number_of_deals: int | None = None, *, seed: int | None = None):
+        """
+        Paired form of iter_games: yields the play_rotated tuple of deal i, played with seed
+        game_seed(seed, i). Seat advantage cancels within a tuple, and so do deal luck and the
+        agents' randomness (common random numbers, one stream per seat) for as long as the mirrored
+        games stay alike. How many games that saves depends on the pairing; matchstats.PairedStats
+        measures it. Winners are seats; use record.winning_player.
+        """
+        run_seed = seed if seed is not None else (self.rng or random).getrandbits(64)
+        played = 0
+        while number_of_deals is None or played < number_of_deals:
+            yield self.play_rotated(game_seed(run_seed, played))
+            played += 1
 
     def repeated_games(
         self,
         number_of_games: int,
         *,
         win_score: int = 1,
+        workers: int | None = None,
+        seed: int | None = None,
+        paired: bool = False,
+    ) -> list[int]:
+        """
+        Plays `number_of_games` games and returns the score per seat (aborted games score for
+        nobody; self.aborted counts them). Game i is played with
+        seed game_seed(seed, i) (seed is drawn from self.rng if not given), whichever process plays it.
+        With `workers` > 1 the games are split into shards of consecutive games that run in a
+        process pool, each with its own copy of the players; the score is the same as with
+        workers=None. workers=0 uses every core.
+        paired=True plays each of the number_of_games deals once per seat rotation (play_rotated,
+        so player_count times as many games) and returns the score per joined player instead of per seat.
+        Raises ValueError for workers > 1 while a sink is attached: the workers could not send it their events.
+        """
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        parallel = workers is not None and workers > 1 and number_of_games > 1
+        if parallel and self.sink is not None:
+            raise ValueError("a sink only receives the games of this process; detach it or play with workers=None")
+        run_seed = seed if seed is not None else (self.rng or random).getrandbits(64)
+        if parallel:
+            return self._parallel_repeated_games(number_of_games, win_score, workers, run_seed, paired)
+        return self._score_games(run_seed, 0, number_of_games, win_score, paired)
+
+    def _score_games(self, run_seed: int, start: int, stop: int, win_score: int, paired: bool = False) -> list[int]:
+        """Plays games (or paired deals) start..stop-1 of the run seeded with run_seed and returns the score."""
+        total_score = [0 for _ in range(len(self._players))]
+        for index in range(start, stop):
+            if paired:
+                records = self.play_rotated(game_seed(run_seed, index))
+            else:
+                records = (self.play_game(seed=game_seed(run_seed, index)),)
+            for record in records:
+                winner = record.winning_player
+                if winner is not None:
+                    total_score[winner] += win_score
+        return total_score
+
+    def _parallel_repeated_games(
+        self, number_of_games: int, win_score: int, workers: int, run_seed: int, paired: bool = False
     ) -> list[int]:
+        # A few shards per worker so one slow shard (long games) doesn't leave cores idle
+        shard_count = min(number_of_games, workers * 4)
+        bounds = [number_of_games * i // shard_count for i in range(shard_count + 1)]
         total_score = [0 for _ in range(len(self._players))]
-        for _ in range(number_of_games):
-            winner = self.play()  # your play() returns an int
-            total_score[winner] += win_score
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # The controller is pickled per shard, so each worker builds its own players
+            shards = pool.map(
+                _play_shard,
+                [self] * shard_count,
+                [run_seed] * shard_count,
+                bounds[:-1],
+                bounds[1:],
+                [win_score] * shard_count,
+                [paired] * shard_count,
+            )
+            for shard_score, shard_profile, shard_aborted in shards:
+                for seat, score in enumerate(shard_score):
+                    total_score[seat] += score
+                if shard_profile is not None:
+                    self.profile.merge(shard_profile)
+                self.aborted.update(shard_aborted)
         return total_score
 
 
-def get_valid_bluff_plays(cards: tuple[str], current_bid: BluffBid) -> list[list[str]]:  #current_bid is currently a dead parameter, since this fucntion only looks at the agent's own hand, but it could be used in the future.
+def _play_shard(
+    controller: BluffController, run_seed: int, start: int, stop: int, win_score: int, paired: bool = False
+) -> tuple[list[int], ControllerProfile | None, Counter[str]]:
+    """
+    Runs games start..stop-1 of a parallel repeated_games call inside a worker process. Returns
+    the score, the profile of just this shard (if the controller is profiling) and its aborted games.
+    """
+    if controller.profile is not None:
+        controller.enable_profiling()
+    controller.aborted = Counter()
+    score = controller._score_games(run_seed, start, stop, win_score, paired)
+    return score, controller.profile, controller.aborted
+
+
+# You may play between 1 and 4 cards, as it is illogical to play more than 4 cards as there are only 4 cards of each rank
+# IMPORTANT: This is an assumption, I should mention this in the report.
+MAX_PLAY = 4
+
+
+def get_valid_bluff_plays(
+    cards: tuple[str], current_bid: BluffBid, *, physical: bool = False
+) -> list[list[str]]:  #current_bid is currently a dead parameter, since this fucntion only looks at the agent's own hand, but it could be used in the future.
     """
     Returns all legal card plays (not challenges) from this hand.
     Does NOT include the challenge action.
+    Every distinct play is listed once; physical=True gives the old list with one entry per
+    combination of physical cards (so duplicates), for callers that sample over the cards themselves.
     """
     if len(cards) == 0:
         return []
-    valid = []
-    # You may play between 1 and 4 cards, as it is illogical to play more than 4 cards as there are only 4 cards of each rank
-    # IMPORTANT: This is an assumption, I should mention this in the report.
-    # What if the agent only holds 1, 2, or 3 cards? does the function still work then? 
-    max_play = 4
-    for k in range(1, max_play + 1):
-        for combo in itertools.combinations(cards, k):
-            valid.append(list(combo))
-    return valid
+    if physical:
+        valid = []
+        for k in range(1, MAX_PLAY + 1):
+            for combo in itertools.combinations(cards, k):
+                valid.append(list(combo))
+        return valid
+    return [list(counts_to_cards(play)) for play in valid_bluff_plays_counts(cards_to_counts(cards))[0]]
+
+
+def iter_valid_bluff_plays(cards: tuple[str], current_bid: BluffBid | None = None):
+    """
+    Lazy form of get_valid_bluff_plays: yields every distinct play once, smallest plays first,
+    generating each one only when it is asked for (nothing is built or cached up front).
+    """
+    for play in _iter_plays_counts(cards_to_counts(cards)):
+        yield list(counts_to_cards(play))
+
+
+def _iter_plays_counts(counts: Counts):
+    """The distinct plays of 1..MAX_PLAY cards from a hand, in the order of valid_bluff_plays_counts."""
+    for k in range(1, MAX_PLAY + 1):
+        for play in itertools.product(*(range(min(n, k) + 1) for n in counts)):
+            if sum(play) == k:
+                yield play
+
+
+@lru_cache(maxsize=None)
+def valid_bluff_plays_counts(counts: Counts) -> tuple[tuple[Counts, ...], tuple[int, ...]]:
+    """
+    All distinct plays from a hand as rank counts, plus how many combinations of physical cards
+    give each play. random.choices(plays, weights) samples exactly like random.choice over
+    get_valid_bluff_plays(..., physical=True). Cached per hand; at most 5^4 hands exist.
+    """
+    plays = []
+    weights = []
+    for play in _iter_plays_counts(counts):
+        plays.append(play)
+        weight = 1
+        for n, m in zip(counts, play):
+            weight *= comb(n, m)
+        weights.append(weight)
+    return tuple(plays), tuple(weights)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from math import sqrt
+
+from bluff import FULL_COUNTS, BluffController, Counts, BluffPlayer, counts_to_cards, game_seed, hand_distribution
+
+# Exact evaluation over the deals instead of over random games. A deal is fully described by the
+# rank counts of every hand and the pile, and there are few of them (85 for two players: 0-4
+# cards of each rank, 8 cards per hand). Every deal is played with its probability as weight, so
+# the deal, by far the biggest source of noise in repeated_games, drops out of the estimate.
+# Deterministic agents (BluffPlayer.deterministic) need one game per deal and give the exact
+# win probability; otherwise every deal gets the same fixed number of seeded games.
+#
+# The deck has no symmetry left to exploit: the ranks are called in a fixed order starting with
+# RANKS[0] and seat 0 moves first, so relabelling ranks or swapping seats gives a different game.
+
+
+def all_deals(player_count: int = 2) -> list[tuple[tuple[Counts, ...], Counts, float]]:
+    """
+    Every distinct deal of BluffController as (hands, pile, probability): each player gets
+    16 // player_count cards of the shuffled deck and the rest starts on the pile.
+    """
+    hand_size = sum(FULL_COUNTS) // player_count
+    deals = [((), FULL_COUNTS, 1.0)]
+    for _ in range(player_count):
+        dealt = []
+        for hands, rest, p in deals:
+            for hand, p_hand in hand_distribution(rest, hand_size):
+                dealt.append(((*hands, hand), tuple(n - m for n, m in zip(rest, hand)), p * p_hand))
+        deals = dealt
+    return deals
+
+
+class DealResult:
+    """The games played from one deal: wins per seat out of `games`, of which `aborted` had no winner."""
+
+    def __init__(self, hands: tuple[Counts, ...], pile: Counts, weight: float):
+        self.hands = hands
+        self.pile = pile
+        self.weight = weight
+        self.games = 0
+        self.aborted = 0
+        self.wins = [0 for _ in hands]
+
+    def win_rate(self, seat: int = 0) -> float:
+        return self.wins[seat] / self.games if self.games else 0.0
+
+    def __str__(self) -> str:
+        hands = "  ".join("".join(counts_to_cards(hand)) for hand in self.hands)
+        return f"{hands}  p={self.weight:.5f}  seat 0 wins {self.wins[0]}/{self.games}"
+
+
+class DealEvaluation:
+    """
+    Win probabilities of a pairing over all deals. With one game per deal of deterministic agents
+    they are exact; otherwise standard_error gives the sampling error that is left.
+    """
+
+    def __init__(self, deals: list[DealResult], exact: bool):
+        self.deals = deals
+        self.exact = exact
+
+    def win_probability(self, seat: int = 0) -> float:
+        return sum(deal.weight * deal.win_rate(seat) for deal in self.deals)
+
+    def abort_probability(self) -> float:
+        return sum(deal.weight * deal.aborted / deal.games for deal in self.deals if deal.games)
+
+    def standard_error(self, seat: int = 0) -> float:
+        if self.exact:
+            return 0.0
+        variance = 0.0
+        for deal in self.deals:
+            if deal.games > 1:
+                p = deal.win_rate(seat)
+                variance += deal.weight**2 * p * (1 - p) / (deal.games - 1)
+        return sqrt(variance)
+
+    def lost_deals(self, seat: int = 0) -> list[DealResult]:
+        """The deals `seat` wins less than half the time, most probable first."""
+        lost = [deal for deal in self.deals if deal.win_rate(seat) < 0.5]
+        return sorted(lost, key=lambda deal: deal.weight, reverse=True)
+
+    def __str__(self) -> str:
+        error = "exact" if self.exact else f"±{self.standard_error(0):.4f} (1 s.e.)"
+        lines = [f"seat 0 wins with probability {self.win_probability(0):.4f} {error} over {len(self.deals)} deals"]
+        aborted = self.abort_probability()
+        if aborted:
+            lines.append(f"probability of an aborted game: {aborted:.4f}")
+        return "\n".join(lines)
+
+
+def evaluate_deals(controller: BluffController, samples_per_deal: int = 32, *, seed: int = 0) -> DealEvaluation:
+    """
+    Plays every deal with the controller's players: once if all of them are deterministic, else
+    samples_per_deal times. Game s of deal d uses game_seed(seed, d * samples_per_deal + s), so two
+    pairings evaluated with the same seed see the same random streams (common random numbers).
+    The controller's limits (max_turns etc.) apply to every game.
+    """
+    players = controller._players
+    exact = all(player.deterministic for player in players)
+    samples = 1 if exact else samples_per_deal
+    results = []
+    for d, (hands, pile, weight) in enumerate(all_deals(len(players))):
+        result = DealResult(hands, pile, weight)
+        for s in range(samples):
+            record = controller.play_game(seed=game_seed(seed, d * samples + s), deal=(hands, pile))
+            result.games += 1
+            if record.winner is None:
+                result.aborted += 1
+            else:
+                result.wins[record.winner] += 1
+        results.append(result)
+    return DealEvaluation(results, exact)
+
+
+def evaluate_pairing(
+    first: type[BluffPlayer],
+    second: type[BluffPlayer],
+    samples_per_deal: int = 32,
+    *,
+    seed: int = 0,
+    max_turns: int | None = 10_000,
+) -> DealEvaluation:
+    """evaluate_deals for fresh agents, `first` in seat 0."""
+    controller = BluffController(max_turns=max_turns)
+    controller.join(first())
+    controller.join(second())
+    return evaluate_deals(controller, samples_per_deal, seed=seed)
+
+
+if __name__ == "__main__":
+    from firstorderplayer import FirstOrderPlayer
+    from zeroorderplayer import ZeroOrderPlayer
+
+    evaluation = evaluate_pairing(FirstOrderPlayer, ZeroOrderPlayer)
+    print(evaluation)
+    for deal in evaluation.lost_deals()[:10]:
+        print(deal)
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import json
+import sys
+
+# Structured game events. The controller hands every event to its sink (BluffController.sink)
+# instead of printing. Events only hold the raw state (rank counts, seat numbers), and nothing
+# is formatted until a sink asks for it, so a sink that drops or serializes events stays cheap.
+
+Counts = tuple[int, ...]  # rank counts in bluff.RANKS order
+
+
+class Event:
+    kind = "event"
+    __slots__ = ("game", "turn")
+
+    def __init__(self, game: int, turn: int):
+        self.game = game
+        self.turn = turn
+
+    def to_dict(self) -> dict:
+        """The event as plain JSON-compatible data, with "event" set to its kind."""
+        data = {"event": self.kind}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                value = getattr(self, name)
+                data[name] = list(value) if isinstance(value, tuple) else value
+        return data
+
+    def describe(self) -> str:
+        return ""
+
+    def __str__(self) -> str:
+        return f"game {self.game} turn {self.turn}: {self.describe()}"
+
+
+def _cards(counts: Counts) -> list[str]:
+    from bluff import counts_to_cards  # bluff imports this module, so only import it back when formatting
+
+    return list(counts_to_cards(tuple(counts)))
+
+
+def _rank(rank: int) -> str:
+    from bluff import RANKS
+
+    return RANKS[rank]
+
+
+class DealEvent(Event):
+    """
+    The start of a game. seats[i] is the joined player in seat i (None: joining order), and
+    dealt is True if the deal was passed to play_game rather than shuffled from the seed.
+    """
+
+    kind = "deal"
+    __slots__ = ("seed", "hands", "pile", "seats", "dealt")
+
+    def __init__(
+        self,
+        game: int,
+        seed: int | None,
+        hands: tuple[Counts, ...],
+        pile: Counts,
+        seats: tuple[int, ...] | None = None,
+        dealt: bool = False,
+    ):
+        super().__init__(game, 0)
+        self.seed = seed
+        self.hands = hands
+        self.pile = pile
+        self.seats = seats
+        self.dealt = dealt
+
+    def to_dict(self) -> dict:
+        data = super().to_dict()
+        data["hands"] = [list(hand) for hand in self.hands]
+        return data
+
+    def describe(self) -> str:
+        hands = ", ".join(f"player {seat} has hand {_cards(hand)}" for seat, hand in enumerate(self.hands))
+        return f"deal (seed {self.seed}): {hands}; pile has {_cards(self.pile)}"
+
+
+class PlayEvent(Event):
+    kind = "play"
+    __slots__ = ("player", "rank", "cards", "bluff")
+
+    def __init__(self, game: int, turn: int, player: int, rank: int, cards: Counts, bluff: bool):
+        super().__init__(game, turn)
+        self.player = player
+        self.rank = rank
+        self.cards = cards
+        self.bluff = bluff
+
+    def describe(self) -> str:
+        return (
+            f"player {self.player} plays {_cards(self.cards)} onto the pile as {sum(self.cards)} x {_rank(self.rank)}"
+            + (" (bluff)" if self.bluff else "")
+        )
+
+
+class ChallengeEvent(Event):
+    kind = "challenge"
+    __slots__ = ("player", "rank", "success", "taker", "pile")
+
+    def __init__(self, game: int, turn: int, player: int, rank: int, success: bool, taker: int, pile: Counts):
+        super().__init__(game, turn)
+        self.player = player
+        self.rank = rank
+        self.success = success
+        self.taker = taker
+        self.pile = pile
+
+    def describe(self) -> str:
+        outcome = "successfully" if self.success else "unsuccessfully"
+        return f"player {self.player} challenged {outcome}; player {self.taker} takes the pile {_cards(self.pile)}"
+
+
+class CheatEvent(Event):
+    kind = "cheat"
+    __slots__ = ("player", "attempted", "pile")
+
+    def __init__(self, game: int, turn: int, player: int, attempted: tuple[int, ...], pile: Counts):
+        super().__init__(game, turn)
+        self.player = player
+        self.attempted = attempted
+        self.pile = pile
+
+    def describe(self) -> str:
+        return f"player {self.player} cheated (tried to play {list(self.attempted)}) and takes the pile {_cards(self.pile)}"
+
+
+class WinEvent(Event):
+    kind = "win"
+    __slots__ = ("winner", "reason")
+
+    EMPTY_HAND = "empty hand"
+    ILLEGAL_CHALLENGE = "illegal challenge"  # the winner challenged without a bid (see GameState.ILLEGAL_CHALLENGE)
+
+    def __init__(self, game: int, turn: int, winner: int, reason: str):
+        super().__init__(game, turn)
+        self.winner = winner
+        self.reason = reason
+
+    def describe(self) -> str:
+        return f"player {self.winner} wins the game ({self.reason})"
+
+
+class AbortEvent(Event):
+    """The controller stopped the game without a winner (see GameRecord.aborted for the reasons)."""
+
+    kind = "abort"
+    __slots__ = ("reason",)
+
+    def __init__(self, game: int, turn: int, reason: str):
+        super().__init__(game, turn)
+        self.reason = reason
+
+    def describe(self) -> str:
+        return f"game aborted ({self.reason})"
+
+
+class EventSink:
+    """Receives the events of every game a controller plays. The base sink drops them."""
+
+    def emit(self, event: Event) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class TeeSink(EventSink):
+    """Passes every event on to several sinks, e.g. a GameRecorder and a TextSink."""
+
+    def __init__(self, *sinks: EventSink):
+        self.sinks = sinks
+
+    def emit(self, event: Event) -> None:
+        for sink in self.sinks:
+            sink.emit(event)
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+class ListSink(EventSink):
+    """Keeps every event in memory, for inspecting a few games from code."""
+
+    def __init__(self):
+        self.events: list[Event] = []
+
+    def emit(self, event: Event) -> None:
+        self.events.append(event)
+
+
+class _BufferedSink(EventSink):
+    """Collects events and writes them in blocks of buffer_size; subclasses turn a block into text."""
+
+    def __init__(self, stream=None, buffer_size: int = 4096):
+        if isinstance(stream, str):
+            stream = open(stream, "w")
+            self._owns_stream = True
+        else:
+            self._owns_stream = False
+        self.stream = stream if stream is not None else sys.stdout
+        self.buffer_size = buffer_size
+        self._buffer: list[Event] = []
+
+    def emit(self, event: Event) -> None:
+        self._buffer.append(event)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def _format(self, events: list[Event]) -> str:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.stream.write(self._format(self._buffer))
+            self._buffer = []
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self._owns_stream:
+            self.stream.close()
+
+
+class TextSink(_BufferedSink):
+    """Human-readable lines, one per event (stdout by default). This is what play(debug=True) uses."""
+
+    def _format(self, events: list[Event]) -> str:
+        return "".join(f"{event}\n" for event in events)
+
+
+class JsonlSink(_BufferedSink):
+    """One compact JSON object per line, for tooling. Takes a path or an open text stream."""
+
+    def _format(self, events: list[Event]) -> str:
+        return "".join(json.dumps(event.to_dict(), separators=(",", ":")) + "\n" for event in events)
@@ -1,8 +1,19 @@
 from __future__ import annotations
 
-import random
-from bluff import BluffPlayer, BluffBid
-from zeroorderplayer import ZeroOrderPlayer
+from bluff import (
+    BluffPlayer,
+    BluffBid,
+    Counts,
+    FULL_COUNTS,
+    RANK_INDEX,
+    RANKS,
+    cards_to_counts,
+    counts_to_cards,
+    hand_distribution,
+    sample_counts,
+)
+from functools import lru_cache
+from zeroorderplayer import tom0_action, tom0_challenge_probability, tom0_would_bluff
 
 FULL_DECK = (
     "A","A","A","A",
@@ -11,80 +22,223 @@ FULL_DECK = (
     "J","J","J","J",
 )
 
+# ToM1 policy kernels: pure functions of explicit state (see the ToM0 kernels in zeroorderplayer.py).
+# The decision kernels are memoized on their arguments, so agents that model a ToM1 opponent
+# can call them for every candidate bid without building a FirstOrderPlayer.
+def tom1_ev_play(my_counts: Counts, current_rank: str, bid_count: int, i_will_bluff: bool, pile_size: int) -> float:
+    M = bid_count
+    P = tom0_challenge_probability(my_counts, current_rank, bid_count)
+
+    if i_will_bluff:
+        return P * (-pile_size) + (1 - P) * M
+    else:
+        return P * pile_size + M
+
+
+#Predictive Theory of Mind
+def tom1_ev_challenge(opponent_counts: Counts, current_rank: str, bid_count: int | None, pile_size: int) -> float:
+    if tom0_would_bluff(opponent_counts, current_rank, bid_count):
+        return float(pile_size)
+    return float(-pile_size)
+
+
+@lru_cache(maxsize=1 << 16)
+def tom1_would_bluff(my_counts: Counts, current_rank: str, bid_count: int, pile_size: int) -> bool:
+    r = RANK_INDEX.get(current_rank)  # type: ignore
+    r_count = my_counts[r] if r is not None else 0
+
+    # If I cannot truthfully play k cards, it must be a bluff
+    if bid_count > r_count:
+        return True
+
+    ev_truth = tom1_ev_play(my_counts, current_rank, bid_count, False, pile_size)
+    ev_bluff = tom1_ev_play(my_counts, current_rank, bid_count, True, pile_size)
+
+    return ev_bluff >= ev_truth
+
+
+@lru_cache(maxsize=1 << 16)
+def tom1_best_play(my_counts: Counts, current_rank: str, pile_size: int) -> tuple[tuple[bool, int], float]:
+    """
+    The (is_bluff, k) play with the highest EV and that EV. Bluffs are considered first, so ties go to bluffing.
+    """
+    r = RANK_INDEX[current_rank]
+    n_truth = my_counts[r]
+    n_bluff = sum(my_counts) - n_truth
+
+    choice: dict[tuple[bool, int], float] = {}
+    for k in range(1, n_bluff + 1):
+        choice[(True, k)] = tom1_ev_play(my_counts, current_rank, k, True, pile_size)
+    for k in range(1, n_truth + 1):
+        choice[(False, k)] = tom1_ev_play(my_counts, current_rank, k, False, pile_size)
+
+    best_action = max(choice, key=choice.get) # type: ignore
+    return best_action, choice[best_action]
+
+
+@lru_cache(maxsize=1 << 16)
+def tom1_decision(
+    my_counts: Counts, opponent_counts: Counts, current_rank: str, bid_count: int | None, pile_size: int
+) -> tuple[bool, int] | None:
+    """
+    The ToM1 move: None to challenge, otherwise (is_bluff, k).
+    """
+    best_action, best_ev = tom1_best_play(my_counts, current_rank, pile_size)
+
+    ev_chal = 0.0
+    if bid_count is not None:
+        ev_chal = tom1_ev_challenge(opponent_counts, current_rank, bid_count, pile_size)
+
+    if ev_chal >= best_ev:
+        return None
+    return best_action
+
+
+@lru_cache(maxsize=1 << 14)
+def tom0_bid_transition(hand: Counts, current_rank: str, bid_count: int) -> tuple[tuple[Counts, float], ...]:
+    """
+    Where a ToM0 opponent holding `hand` ends up after bidding bid_count cards of current_rank (a
+    rank letter): the remaining hands with their probabilities. This is the exact distribution of
+    FirstOrderPlayer's sampled update (truthful: those rank cards leave, bluff: a random bid_count
+    of the other cards leave). The probabilities add up to the likelihood of the bid: 1 if the
+    hand can make it the way ToM0 would, and no outcomes at all if it cannot (too few other cards to bluff with).
+    """
+    r = RANK_INDEX[current_rank]
+    if not tom0_would_bluff(hand, current_rank, bid_count):
+        # ToM0 only plays truthfully when it holds at least bid_count cards of the rank
+        return ((tuple(c - bid_count if i == r else c for i, c in enumerate(hand)), 1.0),)
+    allowed = tuple(0 if i == r else c for i, c in enumerate(hand))
+    if sum(allowed) < bid_count:
+        return ()
+    return tuple(
+        (tuple(c - d for c, d in zip(hand, removed)), p) for removed, p in hand_distribution(allowed, bid_count)
+    )
+
+
 class FirstOrderPlayer(BluffPlayer):
+    # True: keep an exact posterior over the opponent's rank counts (opp_belief, see _update_belief)
+    # and take the challenge EV as an expectation over it. False: the original single sampled opp_counts.
+    exact_beliefs = False
+
     def start_game(self, identifier: int, cards: tuple[str]) -> None:
+        self.start_game_counts(identifier, cards_to_counts(cards))
+
+    def start_game_counts(self, identifier: int, counts: Counts) -> None:
         self.beliefs = {}
-        self.my_cards = cards
+        self.my_counts = counts
         self.player_count = 2
         self.pile_size = 0
         self.identifier = identifier
         self.strategy = True #Default mode is play as ToM1
         self.previous_bid: BluffBid | None = None
-        
-        deck: list[str] = list(FULL_DECK)
-        for c in cards:
-            deck.remove(c)
-        
-        self.opp_cards: tuple[str, ...] = tuple(deck)
-    
-    def _remove_specific(self, pool: list[str], rank: str, n: int) -> None:
-        for _ in range(n):
-            try:
-                pool.remove(rank)
-            except ValueError:
-                break
-    
-    def _remove_random_from(self, pool: list[str], allowed: set[str], n: int) -> None:
-        for _ in range(n):
-            idxs = [i for i, c in enumerate(pool) if c in allowed]
-            if not idxs:
-                return
-            pool.pop(random.choice(idxs))
-    
+
+        # Opponent model: the rank counts of every card not in my hand
+        self.opp_counts: Counts = tuple(full - mine for full, mine in zip(FULL_COUNTS, counts))
+        self.opp_belief: dict[Counts, float] = {self.opp_counts: 1.0}
+
+    @property
+    def my_cards(self) -> tuple[str, ...]:
+        return counts_to_cards(self.my_counts)
+
+    @property
+    def opp_cards(self) -> tuple[str, ...]:
+        return counts_to_cards(self.opp_counts)
+
+    def _remove_specific(self, pool: Counts, rank: str, n: int) -> Counts:
+        r = RANK_INDEX.get(rank)  # type: ignore
+        if r is None:
+            return pool
+        return tuple(max(0, c - n) if i == r else c for i, c in enumerate(pool))
+
+    def _remove_random_from(self, pool: Counts, allowed: set[str], n: int) -> Counts:
+        allowed_pool = tuple(c if rank in allowed else 0 for rank, c in zip(RANKS, pool))
+        removed = sample_counts(allowed_pool, n, self.rng)
+        return tuple(c - d for c, d in zip(pool, removed))
+
     def observe_bid(self, cards: tuple[str], player_count: int, challenge_amount_of_cards: int, current_rank: str, bidder_id: int, current_bid: BluffBid | None) -> None:
-        self.my_cards = cards
+        self.observe_bid_counts(cards_to_counts(cards), player_count, challenge_amount_of_cards, current_rank, bidder_id, current_bid)
+
+    def observe_bid_counts(self, counts: Counts, player_count: int, challenge_amount_of_cards: int, current_rank: str, bidder_id: int, current_bid: BluffBid | None) -> None:
+        self.my_counts = counts
         self.player_count = player_count
-        
+
         if current_bid is None:
             return
-        
-        self.pile_size += current_bid.count 
-        
+
+        self.pile_size += current_bid.count
+
         self.previous_bid = current_bid   #track latest bid
-        
+
         if bidder_id == self.identifier:
             return  #update opponent model only when opponent is bidder
-        
+
         k = current_bid.count
-        
-        would_bluff = ZeroOrderPlayer().tom0_would_bluff(self.opp_cards, current_rank, current_bid) # type: ignore
-        
-        opp_pool = list(self.opp_cards)
-        
+
+        if self.exact_beliefs:
+            # The bid's own rank letter: the controller passes observe_* the rank's index
+            self._update_belief(current_bid.rank, k)
+            return
+
+        would_bluff = self._opponent_would_bluff(current_rank, k)
+
         if not would_bluff:
-            self._remove_specific(opp_pool, current_rank, k) #If ToM1 knows that ToM0 played truthfully, remove those cards from his pool. 
+            self.opp_counts = self._remove_specific(self.opp_counts, current_rank, k) #If ToM1 knows that ToM0 played truthfully, remove those cards from his pool.
         else:
             allowed = set('AKQJ') - {current_rank}
-            self._remove_random_from(opp_pool, allowed, k)
-        
-        self.opp_cards = tuple(opp_pool)
-        
+            self.opp_counts = self._remove_random_from(self.opp_counts, allowed, k)
+
+    def _update_belief(self, current_rank: str, bid_count: int) -> None:
+        """
+        Bayes update of opp_belief on the opponent's bid: every hand is weighted by the likelihood
+        of the bid under the ToM0 model and carried to the hands it leaves behind (tom0_bid_transition),
+        hands that cannot have made the bid drop out, and the result is normalized.
+        """
+        belief: dict[Counts, float] = {}
+        for hand, p_hand in self.opp_belief.items():
+            for after, p_after in tom0_bid_transition(hand, current_rank, bid_count):
+                belief[after] = belief.get(after, 0.0) + p_hand * p_after
+        total = sum(belief.values())
+        if total == 0.0:
+            # No hand I thought possible explains the bid, so the opponent is not playing ToM0. Do what the
+            # sampled update does: every hand bluffed and lost all its other cards
+            r = RANK_INDEX[current_rank]
+            for hand, p_hand in self.opp_belief.items():
+                after = tuple(c if i == r else 0 for i, c in enumerate(hand))
+                belief[after] = belief.get(after, 0.0) + p_hand
+            total = sum(belief.values())
+        self.opp_belief = {hand: p / total for hand, p in belief.items()}
+        self.opp_counts = max(self.opp_belief, key=self.opp_belief.get)  # type: ignore  # most likely hand, for code that wants one
+
+    def expected_opp_counts(self) -> tuple[float, ...]:
+        """Expected number of cards of each rank the opponent holds, under opp_belief."""
+        return tuple(sum(p * hand[r] for hand, p in self.opp_belief.items()) for r in range(4))
+
+    def belief_ev_challenge(self, current_rank: str, bid_count: int, pile_size: int) -> float:
+        """tom1_ev_challenge averaged over opp_belief."""
+        p_bluff = sum(p for hand, p in self.opp_belief.items() if tom0_would_bluff(hand, current_rank, bid_count))
+        return p_bluff * pile_size - (1 - p_bluff) * pile_size
+
+    def _opponent_would_bluff(self, current_rank: str, bid_count: int) -> bool:
+        # The ToM0 opponent model; a separate method so table-backed variants can swap the kernel
+        return tom0_would_bluff(self.opp_counts, current_rank, bid_count)
+
     def observe_challenge(self, cards: tuple[str], player_count: int, challenge_amount_of_cards: int, current_rank: str, challenger_id: int, success: bool) -> None:
+        self.observe_challenge_counts(cards_to_counts(cards), player_count, challenge_amount_of_cards, current_rank, challenger_id, success)
+
+    def observe_challenge_counts(self, counts: Counts, player_count: int, challenge_amount_of_cards: int, current_rank: str, challenger_id: int, success: bool) -> None:
         self.pile_size = 0
         self.previous_bid = None
-        
-        self.my_cards = cards
+
+        self.my_counts = counts
         self.player_count = player_count
-        
-        deck: list[str] = list(FULL_DECK)
-        for c in cards:
-            deck.remove(c)
-        self.opp_cards = tuple(deck)
-        
+
+        self.opp_counts = tuple(full - mine for full, mine in zip(FULL_COUNTS, counts))
+        self.opp_belief = {self.opp_counts: 1.0}
+
         if self.identifier == challenger_id and not success:
             pass
             #self.strategy = not self.strategy   #flip to ToM0 player
-    
+
     def tom1_would_bluff(
     self,
     my_cards: tuple[str, ...],
@@ -92,98 +246,67 @@ class FirstOrderPlayer(BluffPlayer):
     current_rank: str,
     proposed_bid: BluffBid,
 ) -> bool:
-        k = proposed_bid.count
-        r_count = my_cards.count(current_rank)
-
-        # If I cannot truthfully play k cards, it must be a bluff
-        if k > r_count:
-            return True
-
-        ev_truth = self.calculate_ev_play(
-            my_cards,
-            player_count,
-            current_rank,
-            proposed_bid,
-            i_will_bluff=False,
-        )
-
-        ev_bluff = self.calculate_ev_play(
-            my_cards,
-            player_count,
-            current_rank,
-            proposed_bid,
-            i_will_bluff=True,
-        )
-
-        return ev_bluff >= ev_truth
-
-    
-
-    
-    #Predictive Theory of Mind
+        return self.tom1_would_bluff_counts(cards_to_counts(my_cards), player_count, current_rank, proposed_bid)
+
+    def tom1_would_bluff_counts(
+    self,
+    my_counts: Counts,
+    player_count: int,
+    current_rank: str,
+    proposed_bid: BluffBid,
+) -> bool:
+        return tom1_would_bluff(my_counts, current_rank, proposed_bid.count, self.pile_size)
+
     def calculate_ev_challenge(self, opponent_cards: tuple[str, ...], current_rank: str, opponent_last_bid: BluffBid) -> float:
-        if ZeroOrderPlayer().tom0_would_bluff(opponent_cards, current_rank, opponent_last_bid): # type: ignore
-            return float(self.pile_size)
-        return float(-self.pile_size)
-    
+        return self.calculate_ev_challenge_counts(cards_to_counts(opponent_cards), current_rank, opponent_last_bid)
+
+    def calculate_ev_challenge_counts(self, opponent_counts: Counts, current_rank: str, opponent_last_bid: BluffBid) -> float:
+        bid_count = opponent_last_bid.count if opponent_last_bid is not None else None
+        return tom1_ev_challenge(opponent_counts, current_rank, bid_count, self.pile_size)
+
     def calculate_ev_play(self, my_cards: tuple[str, ...], player_count: int, current_rank: str, my_next_bid: BluffBid, i_will_bluff: bool) -> float:
-        M = my_next_bid.count
-        P = ZeroOrderPlayer().calculate_challenge_probability(my_cards, player_count, current_rank, my_next_bid) # type: ignore
-        
-        if i_will_bluff:
-            return P * (-self.pile_size) + (1 - P) * M
-        else:
-            return P * self.pile_size + M
-        
+        return self.calculate_ev_play_counts(cards_to_counts(my_cards), player_count, current_rank, my_next_bid, i_will_bluff)
+
+    def calculate_ev_play_counts(self, my_counts: Counts, player_count: int, current_rank: str, my_next_bid: BluffBid, i_will_bluff: bool) -> float:
+        return tom1_ev_play(my_counts, current_rank, my_next_bid.count, i_will_bluff, self.pile_size)
+
     def take_turn(self, cards: tuple[str], player_count: int, current_rank: str, current_bid: BluffBid | None) -> list[str] | None:
-        self.my_cards = cards
+        action = self.take_turn_counts(cards_to_counts(cards), player_count, current_rank, current_bid)
+        if action is None:
+            return None
+        return list(counts_to_cards(action))
+
+    def take_turn_counts(self, counts: Counts, player_count: int, current_rank: str, current_bid: BluffBid | None) -> Counts | None:
+        self.my_counts = counts
         self.player_count = player_count
-        #ToM1 mode: 
+        bid_count = current_bid.count if current_bid is not None else None
+        #ToM1 mode:
         if self.strategy:
-            bluff_cards = [c for c in cards if c != current_rank]
-            truth_cards = [c for c in cards if c == current_rank]
-            
-            n_bluff = len(bluff_cards)
-            n_truth = len(truth_cards)
-            
-            choice: dict[tuple[bool, int], float] = {}
-        
-            
-            for k in range(1, n_bluff + 1):
-                choice[(True, k)] = self.calculate_ev_play(cards, player_count, current_rank, BluffBid(k, current_rank, 0), True)
-            for k in range(1, n_truth + 1):
-                choice[(False, k)] = self.calculate_ev_play(cards, player_count, current_rank, BluffBid(k, current_rank, 0), False)
-            
-            
-            best_action = max(choice, key=choice.get) # type: ignore
-            
-            ev_chal = 0.0
-            if current_bid is not None:
-                ev_chal = self.calculate_ev_challenge(self.opp_cards, current_rank, current_bid)
-            
-            if ev_chal >= choice[best_action]:
+            decision = self._tom1_decision(counts, current_rank, bid_count)
+            if decision is None:
                 self.previous_bid = None
                 return None
-            
-            is_bluff, k = best_action
+
+            is_bluff, k = decision
             self.previous_bid = BluffBid(k, current_rank, 0)
-            
+
+            r = RANK_INDEX[current_rank]
             if is_bluff:
-                return random.sample(bluff_cards, k)
-            else: 
-                return random.sample(truth_cards, k)
-        
-        else:
-            if current_bid is not None:    
-                if ZeroOrderPlayer().calculate_challenge_probability(cards, player_count, current_rank, current_bid) >= 0.75:    #designer choice (need to explain)
-                    return None     #challenge if high chance to win
-            
-            truth_cards = [p for p in cards if all(c == current_rank for c in p)] #PROBEER 1 KAART TE PAKKEN VOOR SIMPLICITY
-            bluff_cards = [p for p in cards if all(c != current_rank for c in p)]
-            
-            want_to_bluff = cards.count(current_rank) < 3      #I don't know if adding 'self' here so the tom1 agent can access it will break the code       
-            
-            if (want_to_bluff and bluff_cards) or not truth_cards:
-                return bluff_cards
+                # k random non-rank cards, like self.rng.sample(bluff_cards, k)
+                return sample_counts(tuple(0 if i == r else n for i, n in enumerate(counts)), k, self.rng)
             else:
-                return truth_cards
+                return tuple(k if i == r else 0 for i in range(4))
+
+        else:
+            return tom0_action(counts, current_rank, bid_count)
+
+    def _tom1_decision(self, counts: Counts, current_rank: str, bid_count: int | None) -> tuple[bool, int] | None:
+        if not self.exact_beliefs:
+            return tom1_decision(counts, self.opp_counts, current_rank, bid_count, self.pile_size)
+        best_action, best_ev = tom1_best_play(counts, current_rank, self.pile_size)
+        ev_chal = 0.0
+        if bid_count is not None:
+            ev_chal = self.belief_ev_challenge(current_rank, bid_count, self.pile_size)
+        if ev_chal >= best_ev:
+            return None
+        return best_action
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import random
+from math import log, sqrt
+from statistics import NormalDist
+
+from bluff import BluffController, GameRecord, game_seed
+
+
+def z_score(confidence: float) -> float:
+    """Two-sided normal quantile, e.g. 1.96 for confidence=0.95."""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(wins: int, games: int, confidence: float = 0.95) -> tuple[float, float]:
+    """
+    Wilson score interval for a win rate. Behaves well near 0% and 100%, unlike the normal approximation.
+    """
+    if games == 0:
+        return 0.0, 1.0
+    z = z_score(confidence)
+    p = wins / games
+    denominator = 1 + z * z / games
+    centre = (p + z * z / (2 * games)) / denominator
+    half_width = z * sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+
+class RunningStats:
+    """
+    O(1)-memory aggregates over a stream of GameRecords (see BluffController.iter_games):
+    wins per seat, win rates with confidence intervals and the mean and variance of game length.
+    Aborted games are counted separately and left out of `games` and the win rates.
+    """
+
+    def __init__(self, player_count: int = 2):
+        self.games = 0
+        self.aborted = 0
+        self.wins = [0 for _ in range(player_count)]
+        self.challenges = 0
+        self.bluffs = 0
+        self.mean_turns = 0.0
+        self._turns_m2 = 0.0  # Welford's running sum of squared deviations
+
+    def add(self, record: GameRecord) -> None:
+        if record.winner is None:
+            self.aborted += 1
+            return
+        self.games += 1
+        self.wins[record.winner] += 1
+        self.challenges += record.challenges
+        self.bluffs += record.bluffs
+        delta = record.turns - self.mean_turns
+        self.mean_turns += delta / self.games
+        self._turns_m2 += delta * (record.turns - self.mean_turns)
+
+    @property
+    def turns_variance(self) -> float:
+        return self._turns_m2 / (self.games - 1) if self.games > 1 else 0.0
+
+    def win_rate(self, seat: int = 0) -> float:
+        return self.wins[seat] / self.games if self.games else 0.0
+
+    def confidence_interval(self, seat: int = 0, confidence: float = 0.95) -> tuple[float, float]:
+        return wilson_interval(self.wins[seat], self.games, confidence)
+
+    def __str__(self) -> str:
+        low, high = self.confidence_interval(0)
+        return (
+            f"{self.games} games, seat 0 wins {self.win_rate(0):.3f} (95% CI {low:.3f}-{high:.3f}), "
+            f"{self.mean_turns:.1f} turns per game" + (f", {self.aborted} aborted" if self.aborted else "")
+        )
+
+
+class PairedStats:
+    """
+    Paired-difference statistics of a two-player comparison over rotated deals
+    (BluffController.iter_paired_games). Per deal, d = games won by player 0 - games won by player 1
+    (joined players, not seats); its mean is player 0's advantage per deal. Seat and deal luck cancel
+    within a deal, so its variance is at most about that of independent games and smaller when the
+    mirrored games stay alike (variance_reduction reports the ratio).
+    """
+
+    def __init__(self):
+        self.deals = 0
+        self.games = 0
+        self.aborted = 0
+        self.wins = [0, 0]
+        self.mean_difference = 0.0
+        self._difference_m2 = 0.0  # Welford, over the per-deal differences
+        self._outcome_sum = 0  # per-game +1 (player 0 won) / -1 / 0 (aborted), for the unpaired variance
+        self._outcome_squares = 0
+
+    def add(self, records: tuple[GameRecord, ...]) -> None:
+        difference = 0
+        for record in records:
+            self.games += 1
+            winner = record.winning_player
+            if winner is None:
+                self.aborted += 1
+                continue
+            self.wins[winner] += 1
+            outcome = 1 if winner == 0 else -1
+            difference += outcome
+            self._outcome_sum += outcome
+            self._outcome_squares += 1
+        self.deals += 1
+        delta = difference - self.mean_difference
+        self.mean_difference += delta / self.deals
+        self._difference_m2 += delta * (difference - self.mean_difference)
+
+    def win_rate(self, player: int = 0) -> float:
+        decided = self.wins[0] + self.wins[1]
+        return self.wins[player] / decided if decided else 0.5
+
+    @property
+    def difference_variance(self) -> float:
+        return self._difference_m2 / (self.deals - 1) if self.deals > 1 else 0.0
+
+    def standard_error(self) -> float:
+        """Standard error of mean_difference."""
+        return sqrt(self.difference_variance / self.deals) if self.deals else float("inf")
+
+    def confidence_interval(self, confidence: float = 0.95) -> tuple[float, float]:
+        half_width = z_score(confidence) * self.standard_error()
+        return self.mean_difference - half_width, self.mean_difference + half_width
+
+    def variance_reduction(self) -> float:
+        """
+        Variance of d if the games of a deal had been independent, divided by its measured variance:
+        roughly how many times more unpaired games the same confidence would take.
+        """
+        if self.games < 2 or self.deals < 2:
+            return 1.0
+        mean = self._outcome_sum / self.games
+        outcome_variance = (self._outcome_squares - self.games * mean * mean) / (self.games - 1)
+        if self.difference_variance == 0.0:
+            # Every deal came out the same (e.g. mirrored games of two copies of one agent): no noise left
+            return float("inf") if outcome_variance else 1.0
+        return outcome_variance * (self.games / self.deals) / self.difference_variance
+
+    def __str__(self) -> str:
+        low, high = self.confidence_interval()
+        return (
+            f"{self.deals} paired deals ({self.games} games), player 0 wins {self.win_rate(0):.3f}; "
+            f"wins per deal player 0 - player 1: {self.mean_difference:+.3f} (95% CI {low:+.3f} to {high:+.3f}), "
+            f"unpaired/paired variance {self.variance_reduction():.2f}"
+            + (f", {self.aborted} aborted" if self.aborted else "")
+        )
+
+
+def paired_comparison(controller: BluffController, number_of_deals: int = 500, *, seed: int | None = None) -> PairedStats:
+    """PairedStats over number_of_deals rotated deals of a two-player controller."""
+    stats = PairedStats()
+    for records in controller.iter_paired_games(number_of_deals, seed=seed):
+        stats.add(records)
+    return stats
+
+
+def confidence_sequence_radius(games: int, confidence: float = 0.95, rho_games: int = 100) -> float:
+    """
+    Half-width of a time-uniform confidence sequence (Robbins' normal mixture) for a win rate after
+    `games` games. Unlike a fixed-n interval it stays valid when we look after every game and stop
+    as soon as it excludes a value. rho_games sets where the bound is tightest.
+    """
+    if games == 0:
+        return 1.0
+    variance = 0.25 * games  # win/loss outcomes are 1/2-sub-Gaussian
+    rho = 0.25 * rho_games
+    alpha = (1 - confidence) / 2  # per side
+    return sqrt(2 * (variance + rho) * log(sqrt((variance + rho) / rho) / alpha)) / games
+
+
+class SequentialResult:
+    """
+    Outcome of play_until_decided: how many games were decided, joined player 0's wins and the
+    final confidence sequence, which player is better (None if the budget ran out first) and how
+    many games were aborted without a winner.
+    """
+
+    def __init__(
+        self, games: int, wins: int, interval: tuple[float, float], better_player: int | None, aborted: int = 0
+    ):
+        self.games = games
+        self.wins = wins
+        self.interval = interval
+        self.better_player = better_player
+        self.aborted = aborted
+
+    @property
+    def decided(self) -> bool:
+        return self.better_player is not None
+
+    def __str__(self) -> str:
+        verdict = f"player {self.better_player} is better" if self.decided else "undecided"
+        return f"{verdict} after {self.games} games (player 0 win rate in [{self.interval[0]:.3f}, {self.interval[1]:.3f}])"
+
+
+def play_until_decided(
+    controller: BluffController,
+    *,
+    confidence: float = 0.95,
+    max_games: int = 100_000,
+    seed: int | None = None,
+    rho_games: int = 100,
+) -> SequentialResult:
+    """
+    Plays two-player games until joined player 0's win rate is confidently above or below 50%,
+    or until max_games. The players swap seats every game (game i is play_game(seed=game_seed(seed, i))
+    with seating i % 2), so the first-move advantage cancels out and two copies of the same agent
+    never get a verdict. The confidence sequence is checked after every game, so clearly unequal
+    pairings stop after a few dozen games while close ones use the whole budget.
+    Aborted games count towards max_games but not towards the win rate.
+    """
+    run_seed = seed if seed is not None else (controller.rng or random).getrandbits(64)
+    seatings = controller.rotations()
+    games = 0
+    wins = 0
+    aborted = 0
+    low, high = 0.0, 1.0
+    for i in range(max_games):
+        record = controller.play_game(seed=game_seed(run_seed, i), seats=seatings[i % len(seatings)])
+        if record.winner is None:
+            aborted += 1
+            continue
+        games += 1
+        wins += record.winning_player == 0
+        radius = confidence_sequence_radius(games, confidence, rho_games)
+        low, high = max(0.0, wins / games - radius), min(1.0, wins / games + radius)
+        if low > 0.5:
+            return SequentialResult(games, wins, (low, high), 0, aborted)
+        if high < 0.5:
+            return SequentialResult(games, wins, (low, high), 1, aborted)
+    return SequentialResult(games, wins, (low, high), None, aborted)
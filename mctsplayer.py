@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import time
+from math import log, sqrt
+
+from bluff import FULL_COUNTS, RANKS, BluffBid, BluffPlayer, Counts, GameState, cards_to_counts, counts_to_cards, sample_counts
+from zeroorderplayer import tom0_action
+
+# Information-set Monte Carlo tree search (single-observer ISMCTS, Cowling, Powley & Whitehouse 2012)
+# on bluff.GameState. Every iteration deals the cards this player cannot see at random
+# (a determinization consistent with everything it has seen), walks the shared tree using only
+# the moves that are legal in that deal, and finishes the game with a cheap rollout policy.
+# Two-player games only: the hidden cards are split between one opponent and the pile.
+
+
+class _Node:
+    __slots__ = ("parent", "action", "player", "children", "visits", "wins", "available")
+
+    def __init__(self, parent: "_Node | None", action, player: int | None):
+        self.parent = parent
+        self.action = action  # the move that leads here
+        self.player = player  # who made that move; wins are counted for that player
+        self.children: dict = {}
+        self.visits = 0
+        self.wins = 0.0
+        self.available = 0  # how often this move was legal when its parent was selected from
+
+
+class ISMCTSPlayer(BluffPlayer):
+    """
+    Plays the move whose subtree got the most visits after `time_budget` seconds of search (or
+    exactly `iterations` iterations if set, which makes seeded games reproducible).
+    Rollouts follow the ToM0 policy with rollout_epsilon random plays mixed in; rollouts still
+    running after rollout_depth turns are scored by the difference in hand sizes.
+    """
+
+    time_budget = 0.05
+    iterations: int | None = None
+    exploration = 0.7
+    rollout_depth = 60
+    rollout_epsilon = 0.2
+
+    def __init__(self, time_budget: float | None = None, iterations: int | None = None):
+        if time_budget is not None:
+            self.time_budget = time_budget
+        if iterations is not None:
+            self.iterations = iterations
+
+    def start_game_counts(self, identifier: int, counts: Counts) -> None:
+        self.identifier = identifier
+        self.my_counts = counts
+        self.pile_size = 0
+        self.my_pile: Counts = (0, 0, 0, 0)  # the cards I put on the current pile
+        self.my_last_action: Counts = (0, 0, 0, 0)
+        self.last_searched = 0  # iterations of the last search, for inspection
+
+    def start_game(self, identifier: int, cards: tuple[str]):
+        self.start_game_counts(identifier, cards_to_counts(cards))
+
+    def observe_bid(self, cards: tuple[str], player_count: int, challenge_amount_of_cards: int, current_rank: str, bidder_id: int, current_bid: BluffBid | None) -> None:
+        self.observe_bid_counts(cards_to_counts(cards), player_count, challenge_amount_of_cards, current_rank, bidder_id, current_bid)
+
+    def observe_bid_counts(self, counts: Counts, player_count: int, challenge_amount_of_cards: int, current_rank: int, bidder_id: int, current_bid: BluffBid | None) -> None:
+        self.my_counts = counts
+        if current_bid is None:
+            return
+        if current_bid.count == 0:
+            # Nothing was played: the bidder tried to play cards it does not hold and took the pile
+            self.pile_size = 0
+            self.my_pile = (0, 0, 0, 0)
+            return
+        self.pile_size += current_bid.count
+        if bidder_id == self.identifier:
+            self.my_pile = tuple(a + b for a, b in zip(self.my_pile, self.my_last_action))
+
+    def observe_challenge(self, cards: tuple[str], player_count: int, challenge_amount_of_cards: int, current_rank: str, challenger_id: int, success: bool) -> None:
+        self.observe_challenge_counts(cards_to_counts(cards), player_count, challenge_amount_of_cards, current_rank, challenger_id, success)
+
+    def observe_challenge_counts(self, counts: Counts, player_count: int, challenge_amount_of_cards: int, current_rank: int, challenger_id: int, success: bool) -> None:
+        self.my_counts = counts
+        self.pile_size = 0
+        self.my_pile = (0, 0, 0, 0)
+
+    def determinize(self, current_rank: str, current_bid: BluffBid | None) -> GameState:
+        """A full game state consistent with what this player has seen, with the hidden cards dealt at random."""
+        rng = self.rng
+        me = self.identifier
+        unseen = tuple(full - mine - piled for full, mine, piled in zip(FULL_COUNTS, self.my_counts, self.my_pile))
+        opponent_size = max(0, sum(unseen) - (self.pile_size - sum(self.my_pile)))
+        opponent_hand = sample_counts(unseen, opponent_size, rng)
+        opponent_pile = tuple(n - m for n, m in zip(unseen, opponent_hand))
+        if current_bid is None:
+            last_action: Counts = (0, 0, 0, 0)
+        elif current_bid.player_id == me:
+            last_action = self.my_last_action
+        else:
+            last_action = sample_counts(opponent_pile, current_bid.count, rng)
+        hands = [list(self.my_counts), list(opponent_hand)] if me == 0 else [list(opponent_hand), list(self.my_counts)]
+        pile = [a + b for a, b in zip(self.my_pile, opponent_pile)]
+        return GameState(
+            hands,
+            pile,
+            current_player=me,
+            current_rank=RANKS.index(current_rank),
+            last_action=last_action,
+            last_bid=current_bid,
+        )
+
+    def rollout(self, state: GameState) -> None:
+        """Plays `state` forward in place until it ends or rollout_depth turns have passed."""
+        rng = self.rng
+        epsilon = self.rollout_epsilon
+        for _ in range(self.rollout_depth):
+            if state.winner is not None:
+                return
+            if rng.random() < epsilon:
+                actions = state.actions()
+                action = actions[rng.randrange(len(actions))]
+            else:
+                last_bid = state.last_bid
+                action = tom0_action(
+                    tuple(state.hands[state.current_player]),
+                    RANKS[state.current_rank],
+                    last_bid.count if last_bid is not None and last_bid.count else None,
+                )
+            state.step(action)
+
+    def reward(self, state: GameState, player: int) -> float:
+        if state.winner is not None:
+            return 1.0 if state.winner == player else 0.0
+        # Unfinished rollout: 0.5 plus half the hand-size lead, scaled to the deck
+        mine = sum(state.hands[player])
+        theirs = sum(state.hands[1 - player])
+        return 0.5 + (theirs - mine) / (2 * sum(FULL_COUNTS))
+
+    def search(self, current_rank: str, current_bid: BluffBid | None) -> Counts | None:
+        root = _Node(None, None, None)
+        rng = self.rng
+        exploration = self.exploration
+        deadline = time.perf_counter() + self.time_budget
+        iterations = 0
+        while (iterations < self.iterations) if self.iterations is not None else (time.perf_counter() < deadline or not iterations):
+            iterations += 1
+            state = self.determinize(current_rank, current_bid)
+            node = root
+            # Selection: descend while every move legal in this determinization has been tried
+            while state.winner is None:
+                actions = state.actions()
+                untried = [action for action in actions if action not in node.children]
+                for action in actions:
+                    child = node.children.get(action)
+                    if child is not None:
+                        child.available += 1
+                if untried:
+                    # Expansion
+                    action = untried[rng.randrange(len(untried))]
+                    child = _Node(node, action, state.current_player)
+                    child.available = 1
+                    node.children[action] = child
+                    state.step(action)
+                    node = child
+                    break
+                # UCB1 with availability counts in place of the parent's visits
+                best_score = -1.0
+                children = node.children
+                for action in actions:
+                    child = children[action]
+                    score = child.wins / child.visits + exploration * sqrt(log(child.available) / child.visits)
+                    if score > best_score:
+                        best_score = score
+                        node = child
+                state.step(node.action)
+            self.rollout(state)
+            # Backpropagation
+            rewards = (self.reward(state, 0), self.reward(state, 1))
+            while node is not None:
+                node.visits += 1
+                if node.player is not None:
+                    node.wins += rewards[node.player]
+                node = node.parent
+        self.last_searched = iterations
+        best = max(root.children.values(), key=lambda child: child.visits)
+        return best.action
+
+    def take_turn(self, cards: tuple[str], player_count: int, current_rank: str, current_bid: BluffBid | None) -> list[str] | None:
+        action = self.take_turn_counts(cards_to_counts(cards), player_count, current_rank, current_bid)
+        if action is None:
+            return None
+        return list(counts_to_cards(action))
+
+    def take_turn_counts(self, counts: Counts, player_count: int, current_rank: str, current_bid: BluffBid | None) -> Counts | None:
+        self.my_counts = counts
+        action = self.search(current_rank, current_bid)
+        if action is not None:
+            self.my_last_action = action
+        return action
@@ -1,21 +1,20 @@
 from __future__ import annotations
 
-from bluff import BluffBid, BluffPlayer
-from firstorderplayer import FirstOrderPlayer
-from zeroorderplayer import ZeroOrderPlayer
+from bluff import BluffBid, BluffPlayer, Counts, RANK_INDEX, RANKS, cards_to_counts, hand_distribution
+from firstorderplayer import tom1_would_bluff
+from zeroorderplayer import tom0_challenge_probability
 
-import random
+from functools import lru_cache
 from typing import Optional
 
 # Assumes these exist in your project:
 # - FULL_DECK: tuple[str, ...] or list[str]
 # - BluffPlayer base class
 # - BluffBid dataclass/class with .count and (optionally) .rank
-# - ZeroOrderPlayer with:
-#     - tom0_would_bluff(cards: tuple[str, ...], current_rank: str, proposed_bid: BluffBid) -> bool
-#     - calculate_challenge_probability(cards: tuple[str, ...], player_count: int, current_rank: str, current_bid: BluffBid) -> float
-# - FirstOrderPlayer with:
-#     - tom1_would_bluff(my_cards: tuple[str, ...], player_count: int, current_rank: str, proposed_bid: BluffBid) -> bool
+# - the ToM0 kernel in zeroorderplayer.py:
+#     - tom0_challenge_probability(counts: Counts, current_rank: str, bid_count: int | None) -> float
+# - the ToM1 kernel in firstorderplayer.py:
+#     - tom1_would_bluff(my_counts: Counts, current_rank: str, bid_count: int, pile_size: int) -> bool
 
 FULL_DECK = (
     "A","A","A","A",
@@ -24,6 +23,33 @@ FULL_DECK = (
     "J","J","J","J",
 )
 
+@lru_cache(maxsize=1 << 14)
+def exact_tom1_challenge_probability(pool: Counts, hand_size: int, current_rank: str, bid_count: int) -> float:
+    """
+    Exact version of the Monte Carlo estimate in SecondOrderPlayer.predict_tom1_challenge_probability:
+    sums the probability of every opponent hand (drawn from `pool`) for which ToM1 would challenge.
+    """
+    p_challenge = 0.0
+    for opp_hand, p_hand in hand_distribution(pool, hand_size):
+        # ToM1 challenges if EV(challenge) >= 0  <=>  p_win >= 0.5 (given symmetric +/- pile payoff)
+        if tom0_challenge_probability(opp_hand, current_rank, bid_count) >= 0.5:
+            p_challenge += p_hand
+    return p_challenge
+
+
+@lru_cache(maxsize=1 << 12)
+def _hand_sampler(pool: Counts, hand_size: int) -> tuple[tuple[Counts, ...], tuple[float, ...]]:
+    """hand_distribution(pool, hand_size) as (hands, cumulative weights), ready for rng.choices."""
+    outcomes = hand_distribution(pool, hand_size)
+    hands = tuple(hand for hand, _ in outcomes)
+    cumulative = []
+    total = 0.0
+    for _, p in outcomes:
+        total += p
+        cumulative.append(total)
+    return hands, tuple(cumulative)
+
+
 class SecondOrderPlayer(BluffPlayer):
     """
     ToM2 agent: models opponent as ToM1.
@@ -32,6 +58,13 @@ class SecondOrderPlayer(BluffPlayer):
       - Instead, we approximate ToM1's challenge decision from its estimated probability of winning a challenge.
     """
 
+    exact_challenge_prediction = True  # False: the original 30-sample Monte Carlo estimate
+
+    # True: model the opponent's hand with particle_count weighted particles (rank-count hands)
+    # instead of one sampled hand per question; see _filter_bid.
+    particle_filter = False
+    particle_count = 64
+
     def start_game(self, identifier: int, cards: tuple[str, ...]) -> None:
         self.beliefs = {}
         self.my_cards = cards
@@ -50,6 +83,7 @@ class SecondOrderPlayer(BluffPlayer):
         for c in cards:
             deck.remove(c)
         self.opp_pool: list[str] = deck  # mutable belief pool
+        self._reset_particles()
 
     # -------------------------
     # Small utilities for belief updates
@@ -66,17 +100,94 @@ class SecondOrderPlayer(BluffPlayer):
             idxs = [i for i, c in enumerate(pool) if c in allowed]
             if not idxs:
                 return
-            pool.pop(random.choice(idxs))
+            pool.pop(self.rng.choice(idxs))
 
-    def _fresh_tom1_model(self) -> "FirstOrderPlayer":
+    # -------------------------
+    # Particle filter (particle_filter mode)
+    # -------------------------
+    def _reset_particles(self) -> None:
+        """Fresh particles: opponent hands drawn from opp_pool, equally weighted."""
+        n = self.particle_count if self.particle_filter else 0
+        self.particles: list[Counts] = []
+        if n:
+            hands, cumulative = _hand_sampler(cards_to_counts(tuple(self.opp_pool)), self.opp_hand_size)
+            self.particles = self.rng.choices(hands, cum_weights=cumulative, k=n)
+        self.weights: list[float] = [1.0 / n] * n if n else []
+        self._set_belief()
+        self.p_last_bid_bluff: float | None = None  # P(the opponent's last bid was a bluff), set by _filter_bid
+
+    def _filter_bid(self, current_rank: str, bid_count: int) -> None:
         """
-        Option 2 style: create a temporary ToM1 instance and initialize required state.
-        This avoids AttributeError from uninitialized pile_size, etc.
+        One filter step for an opponent bid: every particle is a hand the opponent may have held.
+        The ToM1 model says whether that hand bluffs this bid; hands that could not have made the
+        bid that way get weight 0. Survivors are resampled when the weights degenerate, then
+        moved forward by removing the played cards (the bid rank for a truthful bid, random other cards for a bluff).
         """
-        fo = FirstOrderPlayer()
-        fo.pile_size = self.pile_size
-        fo.player_count = self.player_count
-        return fo
+        r = RANK_INDEX.get(current_rank)  # type: ignore
+        # The kernels are evaluated once per distinct hand; particles repeat a lot after resampling
+        outcomes: dict[Counts, tuple[bool, bool]] = {}
+        for hand in self.particles:
+            if hand not in outcomes:
+                bluff = tom1_would_bluff(hand, current_rank, bid_count, self.pile_size)
+                if bluff:
+                    feasible = sum(hand) - (hand[r] if r is not None else 0) >= bid_count
+                else:
+                    feasible = hand[r] >= bid_count  # type: ignore[index]
+                outcomes[hand] = (bluff, feasible)
+
+        weights = [w if outcomes[hand][1] else 0.0 for hand, w in zip(self.particles, self.weights)]
+        total = sum(weights)
+        if total == 0.0:
+            # No particle explains the bid: the model is off, start over from the pool (already updated by the caller)
+            self._reset_particles()
+            return
+        weights = [w / total for w in weights]
+        self.p_last_bid_bluff = sum(w for hand, w in zip(self.particles, weights) if outcomes[hand][0])
+
+        particles = self.particles
+        if 1.0 / sum(w * w for w in weights) < len(particles) / 2:
+            particles = self._systematic_resample(particles, weights)
+            weights = [1.0 / len(particles)] * len(particles)
+
+        # Move every particle forward; the bluffs of one distinct hand are drawn in a single rng.choices call
+        moved: list[Counts] = [()] * len(particles)
+        by_hand: dict[Counts, list[int]] = {}
+        for i, hand in enumerate(particles):
+            by_hand.setdefault(hand, []).append(i)
+        for hand, indices in by_hand.items():
+            if outcomes[hand][0]:
+                allowed = tuple(0 if rank == current_rank else c for rank, c in zip(RANKS, hand))
+                plays, cumulative = _hand_sampler(allowed, bid_count)
+                played_each = self.rng.choices(plays, cum_weights=cumulative, k=len(indices))
+            else:
+                played_each = [tuple(bid_count if i == r else 0 for i in range(4))] * len(indices)
+            for i, played in zip(indices, played_each):
+                moved[i] = tuple(c - d for c, d in zip(hand, played))
+        self.particles = moved
+        self.weights = weights
+        self._set_belief()
+
+    def _set_belief(self) -> None:
+        # The particles summed per distinct hand, which is what the EV functions iterate over
+        belief: dict[Counts, float] = {}
+        for hand, w in zip(self.particles, self.weights):
+            belief[hand] = belief.get(hand, 0.0) + w
+        self.belief = belief
+
+    def _systematic_resample(self, particles: list[Counts], weights: list[float]) -> list[Counts]:
+        n = len(particles)
+        step = 1.0 / n
+        u = self.rng.random() * step
+        resampled = []
+        i = 0
+        cumulative = weights[0]
+        for _ in range(n):
+            while u > cumulative and i < n - 1:
+                i += 1
+                cumulative += weights[i]
+            resampled.append(particles[i])
+            u += step
+        return resampled
 
     # -------------------------
     # Observations
@@ -107,14 +218,12 @@ class SecondOrderPlayer(BluffPlayer):
             return  # only update opponent model when opponent is bidder
 
         # ToM2 belief update: assume opponent is ToM1; infer whether ToM1 would be bluffing
-        fo = self._fresh_tom1_model()
-
         # IMPORTANT: ToM1 "my_cards" parameter is what ToM2 thinks opponent could have.
         # We approximate with a sample hand drawn from our belief pool.
         # (Because passing the entire pool as a "hand" is not a real hand.)
-        assumed_opp_hand = tuple(random.sample(self.opp_pool, k=min(self.opp_hand_size, len(self.opp_pool))))
+        assumed_opp_hand = tuple(self.rng.sample(self.opp_pool, k=min(self.opp_hand_size, len(self.opp_pool))))
 
-        would_bluff = fo.tom1_would_bluff(assumed_opp_hand, player_count, current_rank, current_bid)  # type: ignore
+        would_bluff = tom1_would_bluff(cards_to_counts(assumed_opp_hand), current_rank, k, self.pile_size)
 
         if not would_bluff:
             # If ToM2 thinks opponent played truthfully: remove rank cards from pool
@@ -124,6 +233,10 @@ class SecondOrderPlayer(BluffPlayer):
             allowed = set("AKQJ") - {current_rank}
             self._remove_random_from(self.opp_pool, allowed, k)
 
+        if self.particle_filter:
+            # The bid carries its rank as a letter (current_rank is the controller's rank index)
+            self._filter_bid(current_bid.rank, k)
+
     def observe_challenge(
         self,
         cards: tuple[str, ...],
@@ -146,6 +259,7 @@ class SecondOrderPlayer(BluffPlayer):
             deck.remove(c)
         self.opp_pool = deck
         self.opp_hand_size = len(FULL_DECK) - len(cards)
+        self._reset_particles()
 
         # Optional: switch modes if you want
         # if self.identifier == challenger_id and not success:
@@ -163,15 +277,17 @@ class SecondOrderPlayer(BluffPlayer):
         """
         EV of challenging opponent's last bid, from ToM2's perspective.
         We model opponent as ToM1 and decide if that ToM1 would have bluffed.
+        In particle_filter mode this is the expectation over the particles instead of one sampled hand.
         """
-        fo = self._fresh_tom1_model()
+        if self.particle_filter and self.p_last_bid_bluff is not None:
+            return self.p_last_bid_bluff * self.pile_size - (1 - self.p_last_bid_bluff) * self.pile_size
 
         # Approximate opponent's actual hand by sampling from the pool snapshot
         pool_list = list(opponent_pool_snapshot)
         sample_n = min(self.opp_hand_size, len(pool_list))
-        assumed_opp_hand = tuple(random.sample(pool_list, k=sample_n))
+        assumed_opp_hand = tuple(self.rng.sample(pool_list, k=sample_n))
 
-        if fo.tom1_would_bluff(assumed_opp_hand, self.player_count, current_rank, opponent_last_bid):  # type: ignore
+        if tom1_would_bluff(cards_to_counts(assumed_opp_hand), current_rank, opponent_last_bid.count, self.pile_size):
             return float(self.pile_size)   # challenge succeeds -> gain pile (per your payoff convention)
         return float(-self.pile_size)      # challenge fails -> lose pile
 
@@ -180,16 +296,17 @@ class SecondOrderPlayer(BluffPlayer):
         current_rank: str,
         my_next_bid: BluffBid,
         sims: int = 30,
+        exact: Optional[bool] = None,
     ) -> float:
         """
         Predict (approx) probability that a ToM1 opponent challenges our bid.
         We approximate ToM1 as using ToM0's challenge probability based on *its own hand*,
-        which we don't know. So we Monte Carlo sample a plausible opponent hand from opp_pool.
+        which we don't know. So we Monte Carlo sample a plausible opponent hand from opp_pool,
+        or, in exact mode (the default, see exact_challenge_prediction), enumerate every possible hand.
         """
         # If pile is empty or trivial, you can still challenge, but probability estimate works anyway.
         sims = max(1, sims)
 
-        zo = ZeroOrderPlayer()
         challenges = 0
 
         pool = self.opp_pool
@@ -198,9 +315,24 @@ class SecondOrderPlayer(BluffPlayer):
         if sample_n == 0:
             return 0.0
 
+        if self.particle_filter and self.particles:
+            # Weighted share of the particle hands whose ToM0 estimate says challenge
+            return sum(
+                w
+                for hand, w in self.belief.items()
+                if tom0_challenge_probability(hand, current_rank, my_next_bid.count) >= 0.5
+            )
+
+        if exact is None:
+            exact = self.exact_challenge_prediction
+        if exact:
+            return exact_tom1_challenge_probability(
+                cards_to_counts(pool), sample_n, current_rank, my_next_bid.count
+            )
+
         for _ in range(sims):
-            opp_hand = tuple(random.sample(pool, k=sample_n))
-            p_win = zo.calculate_challenge_probability(opp_hand, self.player_count, current_rank, my_next_bid)  # type: ignore
+            opp_hand = tuple(self.rng.sample(pool, k=sample_n))
+            p_win = tom0_challenge_probability(cards_to_counts(opp_hand), current_rank, my_next_bid.count)
             # ToM1 challenges if EV(challenge) >= 0  <=>  p_win >= 0.5 (given symmetric +/- pile payoff)
             if p_win >= 0.5:
                 challenges += 1
@@ -279,5 +411,5 @@ class SecondOrderPlayer(BluffPlayer):
         self.previous_bid = BluffBid(k, current_rank, 0)
 
         if is_bluff:
-            return random.sample(bluff_cards, k)
-        return random.sample(truth_cards, k)
+            return self.rng.sample(bluff_cards, k)
+        return self.rng.sample(truth_cards, k)
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import itertools
+import mmap
+import struct
+import sys
+from functools import lru_cache
+
+from bluff import BluffBid, Counts, RANK_INDEX, RANKS
+from firstorderplayer import FirstOrderPlayer, tom1_best_play, tom1_decision, tom1_would_bluff
+from zeroorderplayer import ZeroOrderPlayer, tom0_action, tom0_would_bluff
+
+# Offline policy tables for the ToM0 and ToM1 kernels. Every input of those kernels is small:
+# a hand or opponent pool is one of 5^4 rank-count vectors, the rank one of 4, and bids and
+# pile sizes are at most the 16 cards of the deck. Evaluating them once over that whole space
+# turns every decision into an array lookup.
+#
+#   python policytables.py build [path]   # writes policy_tables.bin
+#   python policytables.py check [path]   # compares every entry with the live kernels
+#
+# The file is MAGIC, a section directory and the arrays themselves, so it can be mmapped and
+# used without parsing. Inputs outside the tables (an int rank, as the controller passes to
+# observe_*, or a bigger bid or pile) fall back to the live kernels.
+
+MAGIC = b"BLUFTAB1"
+DEFAULT_PATH = "policy_tables.bin"
+SECTION = struct.Struct("<24sc7xQQ")  # name, array typecode, byte offset, element count
+
+HANDS = 5 ** 4  # 0-4 cards of each rank
+MAX_CARDS = 16
+BIDS = MAX_CARDS + 2  # bid counts 0..16, plus one slot for "no bid"
+NO_BID = MAX_CARDS + 1
+PILES = MAX_CARDS + 1
+CHALLENGE = 0xFFFF  # tom0_action code for a challenge; plays are nibble-packed rank counts
+
+
+def hand_index(counts: Counts) -> int:
+    a, j, q, k = counts
+    return ((a * 5 + j) * 5 + q) * 5 + k
+
+
+def all_hands():
+    """Every rank-count vector, in hand_index order."""
+    return itertools.product(range(5), repeat=4)
+
+
+def bid_slot(bid_count: int | None) -> int:
+    return NO_BID if bid_count is None else bid_count
+
+
+def pack_action(action: Counts | None) -> int:
+    if action is None:
+        return CHALLENGE
+    a, j, q, k = action
+    return (a << 12) | (j << 8) | (q << 4) | k
+
+
+def unpack_action(code: int) -> Counts | None:
+    if code == CHALLENGE:
+        return None
+    return (code >> 12, (code >> 8) & 0xF, (code >> 4) & 0xF, code & 0xF)
+
+
+def encode_play(play: tuple[bool, int]) -> int:
+    """(is_bluff, k) as one signed byte: -k for a bluff, k for a truthful play."""
+    is_bluff, k = play
+    return -k if is_bluff else k
+
+
+def decode_play(code: int) -> tuple[bool, int]:
+    return (code < 0, abs(code))
+
+
+def build_sections() -> dict[str, tuple[str, list]]:
+    """All tables as {name: (array typecode, flat values)}, indexed as documented in PolicyTables."""
+    tom0_actions = []
+    tom0_bluffs = []
+    tom1_bluffs = []
+    tom1_plays = []
+    tom1_play_evs = []
+    # Bypass the lru caches: the build visits every state once, so caching would only evict the game-time entries
+    tom1_would_bluff_live = tom1_would_bluff.__wrapped__
+    tom1_best_play_live = tom1_best_play.__wrapped__
+    for hand in all_hands():
+        empty = sum(hand) == 0
+        for rank in RANKS:
+            for bid in [*range(MAX_CARDS + 1), None]:
+                tom0_actions.append(pack_action(tom0_action(hand, rank, bid)))
+                tom0_bluffs.append(tom0_would_bluff(hand, rank, bid))
+            for bid in range(MAX_CARDS + 1):
+                for pile in range(PILES):
+                    tom1_bluffs.append(tom1_would_bluff_live(hand, rank, bid, pile))
+            for pile in range(PILES):
+                if empty:
+                    # No play exists; a player without cards has already won, so this is never asked
+                    tom1_plays.append(0)
+                    tom1_play_evs.append(float("-inf"))
+                else:
+                    play, ev = tom1_best_play_live(hand, rank, pile)
+                    tom1_plays.append(encode_play(play))
+                    tom1_play_evs.append(ev)
+    return {
+        "tom0_action": ("H", tom0_actions),
+        "tom0_would_bluff": ("B", tom0_bluffs),
+        "tom1_would_bluff": ("B", tom1_bluffs),
+        "tom1_best_play": ("b", tom1_plays),
+        "tom1_best_play_ev": ("d", tom1_play_evs),
+    }
+
+
+def write_tables(path: str = DEFAULT_PATH) -> None:
+    sections = build_sections()
+    offset = len(MAGIC) + 4 + SECTION.size * len(sections)
+    directory = []
+    blobs = []
+    for name, (typecode, values) in sections.items():
+        offset += -offset % 8  # keep every array 8-byte aligned for the memoryview casts
+        blob = struct.pack(f"<{len(values)}{typecode}", *values)
+        directory.append(SECTION.pack(name.encode(), typecode.encode(), offset, len(values)))
+        blobs.append((offset, blob))
+        offset += len(blob)
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(sections)) + b"".join(directory))
+        for offset, blob in blobs:
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(blob)
+
+
+class PolicyTables:
+    """
+    The tables of a file written by write_tables, as memoryviews over an mmap (self.arrays; little-endian machines):
+      tom0_action[hand, rank, bid_slot]              pack_action(tom0_action(...)), CHALLENGE to challenge
+      tom0_would_bluff[hand, rank, bid_slot]         0/1
+      tom1_would_bluff[hand, rank, bid, pile]        0/1
+      tom1_best_play[hand, rank, pile]               encode_play of tom1_best_play's play
+      tom1_best_play_ev[hand, rank, pile]            its EV
+    with hand = hand_index(counts), rank the index in RANKS and bid_slot(None) for no bid.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a policy table file")
+        (count,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        view = memoryview(self._map)
+        self.arrays: dict[str, memoryview] = {}
+        for i in range(count):
+            name, typecode, offset, length = SECTION.unpack_from(self._map, len(MAGIC) + 4 + i * SECTION.size)
+            typecode = typecode.decode()
+            size = struct.calcsize(typecode)
+            self.arrays[name.rstrip(b"\0").decode()] = view[offset : offset + length * size].cast(typecode)
+        self._tom0_action = self.arrays["tom0_action"]
+        self._tom0_would_bluff = self.arrays["tom0_would_bluff"]
+        self._tom1_would_bluff = self.arrays["tom1_would_bluff"]
+        self._tom1_best_play = self.arrays["tom1_best_play"]
+        self._tom1_best_play_ev = self.arrays["tom1_best_play_ev"]
+
+    def tom0_action(self, counts: Counts, current_rank: str, bid_count: int | None) -> Counts | None:
+        r = RANK_INDEX.get(current_rank)  # type: ignore
+        if r is None or (bid_count is not None and bid_count > MAX_CARDS):
+            return tom0_action(counts, current_rank, bid_count)
+        return unpack_action(self._tom0_action[(hand_index(counts) * 4 + r) * BIDS + bid_slot(bid_count)])
+
+    def tom0_would_bluff(self, counts: Counts, current_rank: str, bid_count: int | None) -> bool:
+        r = RANK_INDEX.get(current_rank)  # type: ignore
+        if r is None or (bid_count is not None and bid_count > MAX_CARDS):
+            return tom0_would_bluff(counts, current_rank, bid_count)
+        return bool(self._tom0_would_bluff[(hand_index(counts) * 4 + r) * BIDS + bid_slot(bid_count)])
+
+    def tom1_would_bluff(self, counts: Counts, current_rank: str, bid_count: int, pile_size: int) -> bool:
+        r = RANK_INDEX.get(current_rank)  # type: ignore
+        if r is None or bid_count > MAX_CARDS or pile_size > MAX_CARDS:
+            return tom1_would_bluff(counts, current_rank, bid_count, pile_size)
+        return bool(self._tom1_would_bluff[((hand_index(counts) * 4 + r) * PILES + bid_count) * PILES + pile_size])
+
+    def tom1_ev_challenge(self, opponent_counts: Counts, current_rank: str, bid_count: int | None, pile_size: int) -> float:
+        if self.tom0_would_bluff(opponent_counts, current_rank, bid_count):
+            return float(pile_size)
+        return float(-pile_size)
+
+    def tom1_decision(
+        self, counts: Counts, opponent_counts: Counts, current_rank: str, bid_count: int | None, pile_size: int
+    ) -> tuple[bool, int] | None:
+        """Table form of firstorderplayer.tom1_decision."""
+        if pile_size > MAX_CARDS:
+            return tom1_decision(counts, opponent_counts, current_rank, bid_count, pile_size)
+        i = (hand_index(counts) * 4 + RANK_INDEX[current_rank]) * PILES + pile_size
+        ev_chal = 0.0
+        if bid_count is not None:
+            ev_chal = self.tom1_ev_challenge(opponent_counts, current_rank, bid_count, pile_size)
+        if ev_chal >= self._tom1_best_play_ev[i]:
+            return None
+        return decode_play(self._tom1_best_play[i])
+
+    def close(self) -> None:
+        for array in self.arrays.values():
+            array.release()
+        self._map.close()
+
+
+@lru_cache(maxsize=None)
+def load_tables(path: str = DEFAULT_PATH) -> PolicyTables:
+    """The tables in `path`, mapped once per process and shared by every table-backed agent."""
+    try:
+        return PolicyTables(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"{path} not found; build it with `python policytables.py build {path}`") from None
+
+
+def check_tables(tables: PolicyTables) -> list[str]:
+    """Compares every entry with the live kernels; returns a description of each mismatch."""
+    mismatches = []
+    expected = build_sections()
+    for name, (_, values) in expected.items():
+        stored = tables.arrays[name]
+        if len(stored) != len(values):
+            mismatches.append(f"{name}: {len(stored)} entries, expected {len(values)}")
+            continue
+        for i, (got, want) in enumerate(zip(stored, values)):
+            if got != want:
+                mismatches.append(f"{name}[{i}]: {got}, expected {want}")
+    return mismatches
+
+
+class TableZeroOrderPlayer(ZeroOrderPlayer):
+    """ZeroOrderPlayer whose moves come from the policy tables (mapped on first use)."""
+
+    tables_path = DEFAULT_PATH
+
+    @property
+    def tables(self) -> PolicyTables:
+        return load_tables(self.tables_path)
+
+    def take_turn_counts(self, counts: Counts, player_count: int, current_rank: str, current_bid: BluffBid | None) -> Counts | None:
+        if (self.deck_size, self.rank_copies) != (MAX_CARDS, 4):
+            return super().take_turn_counts(counts, player_count, current_rank, current_bid)
+        bid_count = current_bid.count if current_bid is not None else None
+        return self.tables.tom0_action(counts, current_rank, bid_count)
+
+
+class TableFirstOrderPlayer(FirstOrderPlayer):
+    """FirstOrderPlayer reading its ToM1 decisions and its ToM0 opponent model from the policy tables."""
+
+    tables_path = DEFAULT_PATH
+
+    @property
+    def tables(self) -> PolicyTables:
+        return load_tables(self.tables_path)
+
+    def _opponent_would_bluff(self, current_rank: str, bid_count: int) -> bool:
+        return self.tables.tom0_would_bluff(self.opp_counts, current_rank, bid_count)
+
+    def _tom1_decision(self, counts: Counts, current_rank: str, bid_count: int | None) -> tuple[bool, int] | None:
+        return self.tables.tom1_decision(counts, self.opp_counts, current_rank, bid_count, self.pile_size)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "build"
+    path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_PATH
+    if command == "build":
+        write_tables(path)
+        print(f"wrote {path}")
+    elif command == "check":
+        problems = check_tables(PolicyTables(path))
+        print("\n".join(problems[:20]) or f"{path} matches the live kernels")
+        sys.exit(1 if problems else 0)
+    else:
+        sys.exit(f"unknown command {command!r}; use build or check")
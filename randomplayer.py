@@ -1,12 +1,18 @@
-from bluff import BluffPlayer, BluffBid, get_valid_bluff_plays
-import random 
+from bluff import BluffPlayer, BluffBid, Counts, cards_to_counts, counts_to_cards, valid_bluff_plays_counts
 
 class RandomBluffPlayer(BluffPlayer):
     def take_turn(self, cards: tuple[str], player_count: int, current_rank: str, current_bid: BluffBid) -> list[str] | None:
-        if current_bid is not None and random.random() < 0.3:     #30 percent chance to challenge. 
+        action = self.take_turn_counts(cards_to_counts(cards), player_count, current_rank, current_bid)
+        if action is None:
             return None
+        return list(counts_to_cards(action))
 
-        valid_plays = get_valid_bluff_plays(cards, current_bid)
+    def take_turn_counts(self, counts: Counts, player_count: int, current_rank: str, current_bid: BluffBid | None) -> Counts | None:
+        if current_bid is not None and self.rng.random() < 0.3:     #30 percent chance to challenge. 
+            return None
+
+        valid_plays, weights = valid_bluff_plays_counts(counts)
         if not valid_plays:
             return None
-        return random.choice(valid_plays)
+        # Weighted by the number of physical card combinations, i.e. a uniform choice over the cards
+        return self.rng.choices(valid_plays, weights)[0]
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+
+from bluff import BluffController, Counts, GameRecord, GameState
+from events import AbortEvent, ChallengeEvent, CheatEvent, DealEvent, EventSink, ListSink, PlayEvent, WinEvent
+
+# Compact game records, appended to one binary file:
+#
+#   file   = MAGIC record*
+#   record = header [seats] deal actions
+#   header = <I body length> <Q seed> <B flags> <B players> <B winner> <I turns>   (little-endian)
+#            (flags: HAS_SEED; for an aborted game the ABORT_FLAGS bit of the reason, winner NO_WINNER;
+#            SEATED if the game was played with play_game(seats=...); DEALT if with play_game(deal=...))
+#   seats  = one u8 per seat, the joined player sitting there (SEATED records only)
+#   deal   = one u16 per hand, then one for the pile
+#   actions = one u16 per turn
+#
+# A hand, pile or play is stored as four 4-bit rank counts (A in the high nibble, RANKS order).
+# A challenge is 0x0000 and a cheat (the player takes the pile) is 0xFFFF; neither is a valid play.
+# The body length makes the file scannable without decoding the actions, and everything is
+# read straight from an mmap, so millions of games can be indexed without re-simulating them.
+
+MAGIC = b"BLUFREC1"
+HEADER = struct.Struct("<IQBBBI")
+HAS_SEED = 1
+ABORT_FLAGS = {GameRecord.MAX_TURNS: 2, GameRecord.REPEATED_STATE: 4, GameRecord.TIME_LIMIT: 8}
+SEATED = 16
+DEALT = 32
+NO_WINNER = 0xFF
+
+CHALLENGE = 0x0000
+CHEAT = 0xFFFF
+# The record does not keep the cards of a cheat; to replay one, step() gets a play no hand can hold
+CHEATED_PLAY = (5, 5, 5, 5)
+
+
+def pack_counts(counts: Counts) -> int:
+    a, j, q, k = counts
+    return (a << 12) | (j << 8) | (q << 4) | k
+
+
+def unpack_counts(code: int) -> Counts:
+    return (code >> 12, (code >> 8) & 0xF, (code >> 4) & 0xF, code & 0xF)
+
+
+def encode_game(
+    seed: int | None,
+    winner: int | None,
+    hands: tuple[Counts, ...],
+    pile: Counts,
+    actions: list[int],
+    aborted: str | None = None,
+    seats: tuple[int, ...] | None = None,
+    dealt: bool = False,
+) -> bytes:
+    """One record; actions are already packed (pack_counts, CHALLENGE or CHEAT)."""
+    deal = [pack_counts(hand) for hand in hands] + [pack_counts(pile)]
+    body = struct.pack(f"<{len(deal)}H{len(actions)}H", *deal, *actions)
+    if seats is not None:
+        body = bytes(seats) + body
+    header = HEADER.pack(
+        HEADER.size - 4 + len(body),
+        seed if seed is not None else 0,
+        (HAS_SEED if seed is not None else 0)
+        | ABORT_FLAGS.get(aborted, 0)
+        | (SEATED if seats is not None else 0)
+        | (DEALT if dealt else 0),
+        len(hands),
+        winner if winner is not None else NO_WINNER,
+        len(actions),
+    )
+    return header + body
+
+
+class ActionEncoder:
+    """Collects the packed action of every turn of one game from its events."""
+
+    def __init__(self):
+        self.codes: list[int] = []
+        self._cheated = False
+
+    def add(self, event) -> None:
+        if isinstance(event, PlayEvent):
+            # A cheat is reported as a CheatEvent followed by an empty PlayEvent
+            self.codes.append(CHEAT if self._cheated else pack_counts(event.cards))
+            self._cheated = False
+        elif isinstance(event, ChallengeEvent):
+            self.codes.append(CHALLENGE)
+        elif isinstance(event, CheatEvent):
+            self._cheated = True
+        elif isinstance(event, WinEvent) and event.reason == WinEvent.ILLEGAL_CHALLENGE:
+            self.codes.append(CHALLENGE)  # ends the game, so there is no ChallengeEvent
+
+
+class GameRecorder(EventSink):
+    """
+    Event sink that turns the events of every game into a record and appends it to `path`
+    (writing the file header first if the file is new). Attach it as controller.sink, or
+    combine it with other sinks through events.TeeSink. Records are written in blocks of buffer_size games.
+    Every game the controller plays has a seed, and the record keeps the seating and whether the
+    deal was given explicitly, so every record can be replayed with its agents.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1024):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "ab")
+        if new_file:
+            self.file.write(MAGIC)
+        self.buffer_size = buffer_size
+        self._records: list[bytes] = []
+        self._deal: DealEvent | None = None
+        self._actions = ActionEncoder()
+
+    def emit(self, event) -> None:
+        if isinstance(event, DealEvent):
+            self._deal = event
+            self._actions = ActionEncoder()
+            return
+        self._actions.add(event)
+        if isinstance(event, (WinEvent, AbortEvent)):
+            deal = self._deal
+            winner, aborted = (event.winner, None) if isinstance(event, WinEvent) else (None, event.reason)
+            record = encode_game(
+                deal.seed, winner, deal.hands, deal.pile, self._actions.codes, aborted, deal.seats, deal.dealt
+            )
+            self._records.append(record)
+            if len(self._records) >= self.buffer_size:
+                self.flush()
+
+    def flush(self) -> None:
+        if self._records:
+            self.file.write(b"".join(self._records))
+            self._records = []
+        self.file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+
+def replay_action(code: int) -> Counts | None:
+    """A stored action as an action for GameState.step."""
+    if code == CHALLENGE:
+        return None
+    if code == CHEAT:
+        return CHEATED_PLAY
+    return unpack_counts(code)
+
+
+class StoredGame:
+    """A record in a RecordFile. Header fields are decoded eagerly, the actions on demand."""
+
+    def __init__(self, buffer, offset: int):
+        _, seed, flags, players, winner, turns = HEADER.unpack_from(buffer, offset)
+        self.seed = seed if flags & HAS_SEED else None
+        self.player_count = players
+        self.winner = winner if winner != NO_WINNER else None
+        self.aborted = next((reason for reason, flag in ABORT_FLAGS.items() if flags & flag), None)
+        self.turns = turns
+        self.dealt = bool(flags & DEALT)
+        self._buffer = buffer
+        self._deal_offset = offset + HEADER.size
+        self.seats: tuple[int, ...] | None = None  # joined player per seat, for games played with seats
+        if flags & SEATED:
+            self.seats = tuple(buffer[self._deal_offset : self._deal_offset + players])
+            self._deal_offset += players
+
+    @property
+    def deal(self) -> tuple[tuple[Counts, ...], Counts]:
+        """(hands, pile) as dealt."""
+        codes = struct.unpack_from(f"<{self.player_count + 1}H", self._buffer, self._deal_offset)
+        counts = [unpack_counts(code) for code in codes]
+        return tuple(counts[:-1]), counts[-1]
+
+    def action_codes(self) -> tuple[int, ...]:
+        offset = self._deal_offset + 2 * (self.player_count + 1)
+        return struct.unpack_from(f"<{self.turns}H", self._buffer, offset)
+
+    def actions(self) -> list[Counts | None]:
+        """The action of every turn: played Counts, None for a challenge, CHEAT for a cheat."""
+        return [
+            None if code == CHALLENGE else CHEAT if code == CHEAT else unpack_counts(code)
+            for code in self.action_codes()
+        ]
+
+    def state_at(self, turn: int | None = None) -> GameState:
+        """
+        The game after `turn` turns (the end of the game for None), rebuilt without any agents by
+        stepping a GameState through the stored actions, so the controller's rules apply.
+        """
+        hands, pile = self.deal
+        state = GameState([list(hand) for hand in hands], list(pile))
+        codes = self.action_codes()
+        for code in codes[: len(codes) if turn is None else turn]:
+            state.step(replay_action(code))
+        return state
+
+
+class RecordFile:
+    """
+    Read access to a file written by GameRecorder, through an mmap. Iterating scans the records
+    in order; index() builds the offset table that makes file[i] O(1).
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a game record file")
+        self._offsets: list[int] | None = None
+
+    def _scan(self):
+        offset = len(MAGIC)
+        end = len(self._map)
+        while offset < end:
+            yield offset
+            offset += 4 + struct.unpack_from("<I", self._map, offset)[0]
+
+    def index(self) -> list[int]:
+        if self._offsets is None:
+            self._offsets = list(self._scan())
+        return self._offsets
+
+    def __iter__(self):
+        for offset in self._scan():
+            yield StoredGame(self._map, offset)
+
+    def __len__(self) -> int:
+        return len(self.index())
+
+    def __getitem__(self, i: int) -> StoredGame:
+        return StoredGame(self._map, self.index()[i])
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def replay_with_agents(controller: BluffController, game: StoredGame, *, sink: EventSink | None = None) -> GameRecord:
+    """
+    Replays a seeded game with the controller's agents (fresh per game anyway), so every random
+    draw the agents make happens again, with the stored seating and, for games played with an
+    explicit deal, that deal. The events go to `sink` as well; raises ValueError if the agents
+    did not reproduce the stored actions.
+    """
+    if game.seed is None:
+        raise ValueError("only seeded games can be replayed with agents")
+    if game.player_count != len(controller._players):
+        raise ValueError(f"the game had {game.player_count} players, the controller has {len(controller._players)}")
+    events = ListSink()
+    previous, controller.sink = controller.sink, events
+    try:
+        record = controller.play_game(seed=game.seed, deal=game.deal if game.dealt else None, seats=game.seats)
+    finally:
+        controller.sink = previous
+    actions = ActionEncoder()
+    for event in events.events:
+        if sink is not None:
+            sink.emit(event)
+        actions.add(event)
+    if tuple(actions.codes) != game.action_codes():
+        raise ValueError(f"replay of seed {game.seed} diverged from the stored game")
+    return record
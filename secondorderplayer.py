@@ -1,9 +1,19 @@
 from __future__ import annotations
 
-from bluff import BluffBid,  BluffPlayer
-from firstorderplayer import FirstOrderPlayer
-from zeroorderplayer import ZeroOrderPlayer
-import random
+from bluff import (
+    BluffBid,
+    BluffPlayer,
+    Counts,
+    FULL_COUNTS,
+    RANK_INDEX,
+    RANKS,
+    cards_to_counts,
+    counts_to_cards,
+    sample_counts,
+)
+from firstorderplayer import tom1_would_bluff
+from functools import lru_cache
+from zeroorderplayer import tom0_challenge_probability
 
 FULL_DECK = (
     "A","A","A","A",
@@ -14,89 +24,161 @@ FULL_DECK = (
 
 #second order is praktisch hetzelfde, alleen geef dan de firstorder logica door ipv the zeroorder
 
+# Memoized ToM2 recursion. Everything the recursion depends on is in the arguments
+# (own counts, opponent pool counts, rank, bid count, pile size, depth), so every sub-question
+# is evaluated once per distinct state: the cost grows linearly with depth instead of exponentially.
+TOM2_CACHE_SIZE = 1 << 16
+
+
+def tom2_ev_challenge(opponent_counts: Counts, current_rank: str, bid_count: int, pile_size: int) -> float:
+    if tom1_would_bluff(opponent_counts, current_rank, bid_count, pile_size):
+        return float(pile_size)
+    return float(-pile_size)
+
+
+@lru_cache(maxsize=TOM2_CACHE_SIZE)
+def tom2_would_challenge(
+    my_counts: Counts, opponent_counts: Counts, current_rank: str, bid_count: int, pile_size: int, depth: int
+) -> bool:
+    """
+    Whether the (ToM1) opponent would challenge a bid of bid_count cards, reasoning `depth` levels deep.
+    """
+    # Base case: stop recursion and use a simple proxy (ToM0-style)
+    if depth <= 0:
+        return tom0_challenge_probability(opponent_counts, current_rank, bid_count) >= 0.75
+
+    # EV of challenging
+    ev_chal = tom2_ev_challenge(opponent_counts, current_rank, bid_count, pile_size)
+
+    # Compute best EV among possible plays
+    r = RANK_INDEX[current_rank]
+    n_truth = my_counts[r]
+    n_bluff = sum(my_counts) - n_truth
+
+    best_play_ev = float("-inf")
+    for k in range(1, n_bluff + 1):
+        ev = tom2_ev_play(my_counts, opponent_counts, current_rank, k, True, pile_size, depth - 1)
+        best_play_ev = max(best_play_ev, ev)
+    for k in range(1, n_truth + 1):
+        ev = tom2_ev_play(my_counts, opponent_counts, current_rank, k, False, pile_size, depth - 1)
+        best_play_ev = max(best_play_ev, ev)
+
+    return ev_chal >= best_play_ev
+
+
+def tom2_ev_play(
+    my_counts: Counts,
+    opponent_counts: Counts,
+    current_rank: str,
+    bid_count: int,
+    i_will_bluff: bool,
+    pile_size: int,
+    depth: int,
+) -> float:
+    # ToM2: predict whether a ToM1 opponent would challenge
+    will_challenge = tom2_would_challenge(my_counts, opponent_counts, current_rank, bid_count, pile_size, depth)
+
+    if i_will_bluff:
+        return -pile_size if will_challenge else bid_count
+    else:
+        return pile_size if will_challenge else bid_count
+
+
+def tom2_cache_info():
+    """
+    Hit/miss statistics of the ToM2 memo cache (a functools _CacheInfo: hits, misses, maxsize, currsize).
+    """
+    return tom2_would_challenge.cache_info()
+
+
+def tom2_cache_clear() -> None:
+    tom2_would_challenge.cache_clear()
+
+
 class SecondOrderPlayer(BluffPlayer):
+    depth = 1  # recursion depth of the ToM2 reasoning in take_turn
+
     def start_game(self, identifier: int, cards: tuple[str]):
+        self.start_game_counts(identifier, cards_to_counts(cards))
+
+    def start_game_counts(self, identifier: int, counts: Counts) -> None:
         self.beliefs = {}
-        self.my_cards = cards
+        self.my_counts = counts
         self.player_count = 2
         self.pile_size = 0
         self.identifier = identifier
         self.strategy = True #Default mode is play as ToM1
-        self.previous_bid: BluffBid | None = None     
-        
-        deck: list[str] = list(FULL_DECK)
-        for c in cards:
-            deck.remove(c)
-        self.opp_cards: tuple[str, ...] = tuple(deck)
-    
-    def _remove_specific(self, pool: list[str], rank: str, n: int) -> None:
-        for _ in range(n):
-            try:
-                pool.remove(rank)
-            except ValueError:
-                break
-    
-    def _remove_random_from(self, pool: list[str], allowed: set[str], n: int) -> None:
-        for _ in range(n):
-            idxs = [i for i, c in enumerate(pool) if c in allowed]
-            if not idxs:
-                return
-            pool.pop(random.choice(idxs))
-    
+        self.previous_bid: BluffBid | None = None
+
+        self.opp_counts: Counts = tuple(full - mine for full, mine in zip(FULL_COUNTS, counts))
+
+    @property
+    def my_cards(self) -> tuple[str, ...]:
+        return counts_to_cards(self.my_counts)
+
+    @property
+    def opp_cards(self) -> tuple[str, ...]:
+        return counts_to_cards(self.opp_counts)
+
+    def _remove_specific(self, pool: Counts, rank: str, n: int) -> Counts:
+        r = RANK_INDEX.get(rank)  # type: ignore
+        if r is None:
+            return pool
+        return tuple(max(0, c - n) if i == r else c for i, c in enumerate(pool))
+
+    def _remove_random_from(self, pool: Counts, allowed: set[str], n: int) -> Counts:
+        allowed_pool = tuple(c if rank in allowed else 0 for rank, c in zip(RANKS, pool))
+        removed = sample_counts(allowed_pool, n, self.rng)
+        return tuple(c - d for c, d in zip(pool, removed))
+
     def observe_bid(self, cards: tuple[str], player_count: int, challenge_amount_of_cards: int, current_rank: str, bidder_id: int, current_bid: BluffBid | None) -> None:
-        self.my_cards = cards
+        self.observe_bid_counts(cards_to_counts(cards), player_count, challenge_amount_of_cards, current_rank, bidder_id, current_bid)
+
+    def observe_bid_counts(self, counts: Counts, player_count: int, challenge_amount_of_cards: int, current_rank: str, bidder_id: int, current_bid: BluffBid | None) -> None:
+        self.my_counts = counts
         self.player_count = player_count
-        
+
         if current_bid is None:
             return
-        
-        self.pile_size += current_bid.count 
-        
+
+        self.pile_size += current_bid.count
+
         self.previous_bid = current_bid   #track latest bid
-        
+
         if bidder_id == self.identifier:
             return  #update opponent model only when opponent is bidder
-        
+
         k = current_bid.count
-        
-        fo = FirstOrderPlayer()
-        fo.pile_size = self.pile_size
-        fo.player_count = self.player_count
-        would_bluff = fo.tom1_would_bluff(self.opp_cards, player_count, current_rank, current_bid)
-        
-        opp_pool = list(self.opp_cards)
-        
+
+        would_bluff = tom1_would_bluff(self.opp_counts, current_rank, k, self.pile_size)
+
         if not would_bluff:
-            self._remove_specific(opp_pool, current_rank, k) #If ToM2 knows that ToM1 played truthfully, remove those cards from his pool. 
+            self.opp_counts = self._remove_specific(self.opp_counts, current_rank, k) #If ToM2 knows that ToM1 played truthfully, remove those cards from his pool.
         else:
             allowed = set('AKQJ') - {current_rank}
-            self._remove_random_from(opp_pool, allowed, k)
+            self.opp_counts = self._remove_random_from(self.opp_counts, allowed, k)
 
-        self.opp_cards = tuple(opp_pool)
-        
     def observe_challenge(self, cards: tuple[str], player_count: int, challenge_amount_of_cards: int, current_rank: str, challenger_id: int, success: bool) -> None:
+        self.observe_challenge_counts(cards_to_counts(cards), player_count, challenge_amount_of_cards, current_rank, challenger_id, success)
+
+    def observe_challenge_counts(self, counts: Counts, player_count: int, challenge_amount_of_cards: int, current_rank: str, challenger_id: int, success: bool) -> None:
         self.pile_size = 0
         self.previous_bid = None
-        
-        self.my_cards = cards
+
+        self.my_counts = counts
         self.player_count = player_count
-        
-        deck: list[str] = list(FULL_DECK)
-        for c in cards:
-            deck.remove(c)
-        self.opp_cards = tuple(deck)
-        
+
+        self.opp_counts = tuple(full - mine for full, mine in zip(FULL_COUNTS, counts))
+
         if self.identifier == challenger_id and not success:
             pass
             #self.strategy = not self.strategy   #flip to ToM0 player
-            
+
     def calculate_ev_challenge(self, opponent_cards: tuple[str, ...], current_rank: str, opponent_last_bid: BluffBid) -> float:
-        fo = FirstOrderPlayer()
-        fo.pile_size = self.pile_size
-        fo.player_count = self.player_count
-        if fo.tom1_would_bluff(opponent_cards, self.player_count, current_rank, opponent_last_bid):
-            return float(self.pile_size)
-        return float(-self.pile_size)
+        return self.calculate_ev_challenge_counts(cards_to_counts(opponent_cards), current_rank, opponent_last_bid)
+
+    def calculate_ev_challenge_counts(self, opponent_counts: Counts, current_rank: str, opponent_last_bid: BluffBid) -> float:
+        return tom2_ev_challenge(opponent_counts, current_rank, opponent_last_bid.count, self.pile_size)
 
     def tom1_would_challenge(
     self,
@@ -105,56 +187,21 @@ class SecondOrderPlayer(BluffPlayer):
     current_rank: str,
     current_bid: BluffBid | None,
     depth: int = 1
+) -> bool:
+        return self.tom1_would_challenge_counts(cards_to_counts(my_cards), player_count, current_rank, current_bid, depth)
+
+    def tom1_would_challenge_counts(
+    self,
+    my_counts: Counts,
+    player_count: int,
+    current_rank: str,
+    current_bid: BluffBid | None,
+    depth: int = 1
 ) -> bool:
         # Cannot challenge if there is no bid
         if current_bid is None:
             return False
-
-        # Base case: stop recursion and use a simple proxy (ToM0-style)
-        if depth <= 0:
-            P = ZeroOrderPlayer().calculate_challenge_probability(
-                self.opp_cards, player_count, current_rank, current_bid #type: ignore
-            )
-            return P >= 0.75
-
-        # EV of challenging
-        ev_chal = self.calculate_ev_challenge(
-            self.opp_cards,
-            current_rank,
-            current_bid,
-        )
-
-        # Compute best EV among possible plays
-        bluff_cards = [c for c in my_cards if c != current_rank]
-        truth_cards = [c for c in my_cards if c == current_rank]
-
-        best_play_ev = float("-inf")
-
-        for k in range(1, len(bluff_cards) + 1):
-            ev = self.calculate_ev_play(
-                my_cards,
-                player_count,
-                current_rank,
-                BluffBid(k, current_rank, 0),
-                True,
-                depth=depth - 1,
-            )
-            best_play_ev = max(best_play_ev, ev)
-
-        for k in range(1, len(truth_cards) + 1):
-            ev = self.calculate_ev_play(
-                my_cards,
-                player_count,
-                current_rank,
-                BluffBid(k, current_rank, 0),
-                False,
-                depth=depth - 1,
-            )
-            best_play_ev = max(best_play_ev, ev)
-
-        return ev_chal >= best_play_ev
-
-
+        return tom2_would_challenge(my_counts, self.opp_counts, current_rank, current_bid.count, self.pile_size, depth)
 
     def calculate_ev_play(
         self,
@@ -165,61 +212,61 @@ class SecondOrderPlayer(BluffPlayer):
         i_will_bluff: bool,
         depth: int = 1
     ) -> float:
-
-        M = my_next_bid.count
-
-        # ToM2: predict whether a ToM1 opponent would challenge
-        will_challenge = self.tom1_would_challenge(
-            my_cards=my_cards,
-            player_count=player_count,
-            current_rank=current_rank,
-            current_bid=my_next_bid,
-            depth=depth
+        return self.calculate_ev_play_counts(
+            cards_to_counts(my_cards), player_count, current_rank, my_next_bid, i_will_bluff, depth
         )
 
-        if i_will_bluff:
-            return -self.pile_size if will_challenge else M
-        else:
-            return self.pile_size if will_challenge else M
-
+    def calculate_ev_play_counts(
+        self,
+        my_counts: Counts,
+        player_count: int,
+        current_rank: str,
+        my_next_bid: BluffBid,
+        i_will_bluff: bool,
+        depth: int = 1
+    ) -> float:
+        return tom2_ev_play(
+            my_counts, self.opp_counts, current_rank, my_next_bid.count, i_will_bluff, self.pile_size, depth
+        )
 
-    
     def take_turn(self, cards: tuple[str], player_count: int, current_rank: str, current_bid: BluffBid | None) -> list[str] | None:
-        self.my_cards = cards
+        action = self.take_turn_counts(cards_to_counts(cards), player_count, current_rank, current_bid)
+        if action is None:
+            return None
+        return list(counts_to_cards(action))
+
+    def take_turn_counts(self, counts: Counts, player_count: int, current_rank: str, current_bid: BluffBid | None) -> Counts | None:
+        self.my_counts = counts
         self.player_count = player_count
-        #ToM1 mode: 
+        #ToM1 mode:
         if self.strategy:
-            bluff_cards = [c for c in cards if c != current_rank]
-            truth_cards = [c for c in cards if c == current_rank]
-            
-            n_bluff = len(bluff_cards)
-            n_truth = len(truth_cards)
-            
+            r = RANK_INDEX[current_rank]
+            n_truth = counts[r]
+            n_bluff = sum(counts) - n_truth
+
             choice: dict[tuple[bool, int], float] = {}
-        
-            
+
+
             for k in range(1, n_bluff + 1):
-                choice[(True, k)] = self.calculate_ev_play(cards, player_count, current_rank, BluffBid(k, current_rank, 0), True)
+                choice[(True, k)] = tom2_ev_play(counts, self.opp_counts, current_rank, k, True, self.pile_size, self.depth)
             for k in range(1, n_truth + 1):
-                choice[(False, k)] = self.calculate_ev_play(cards, player_count, current_rank, BluffBid(k, current_rank, 0), False)
-            
-            
+                choice[(False, k)] = tom2_ev_play(counts, self.opp_counts, current_rank, k, False, self.pile_size, self.depth)
+
+
             best_action = max(choice, key=choice.get) # type: ignore
-            
+
             ev_chal = 0.0
             if current_bid is not None:
-                ev_chal = self.calculate_ev_challenge(self.opp_cards, current_rank, current_bid)
-            
+                ev_chal = self.calculate_ev_challenge_counts(self.opp_counts, current_rank, current_bid)
+
             if ev_chal >= choice[best_action]:
                 self.previous_bid = None
                 return None
-            
+
             is_bluff, k = best_action
             self.previous_bid = BluffBid(k, current_rank, 0)
-            
+
             if is_bluff:
-                return random.sample(bluff_cards, k)
-            else: 
-                return random.sample(truth_cards, k)
-    
-    
\ No newline at end of file
+                return sample_counts(tuple(0 if i == r else n for i, n in enumerate(counts)), k, self.rng)
+            else:
+                return tuple(k if i == r else 0 for i in range(4))
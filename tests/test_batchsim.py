@@ -0,0 +1,93 @@
+from math import sqrt
+
+import numpy as np
+
+from batchsim import BatchBluffController, BatchPolicy, BatchRandomPolicy, BatchZeroOrderPolicy
+from bluff import BluffController, BluffPlayer
+from randomplayer import RandomBluffPlayer
+from zeroorderplayer import ZeroOrderPlayer
+
+
+class FixedDealController(BatchBluffController):
+    """Batch controller that plays given (players, 4, games) hands and (4, games) piles."""
+
+    def __init__(self, hands: np.ndarray, pile: np.ndarray):
+        super().__init__()
+        self.hands = hands
+        self.pile = pile
+
+    def _deal(self, number_of_games, rng):
+        return self.hands.copy(), self.pile.copy()
+
+
+def seeded_deals(number_of_games: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    controller = BatchBluffController()
+    controller.join(BatchPolicy())
+    controller.join(BatchRandomPolicy(np.random.default_rng(0)))
+    return controller._deal(number_of_games, np.random.default_rng(seed))
+
+
+def scalar_winners(players: list[BluffPlayer], hands: np.ndarray, pile: np.ndarray, max_turns: int) -> list[int]:
+    controller = BluffController(max_turns=max_turns)
+    for player in players:
+        controller.join(player)
+    winners = []
+    for g in range(hands.shape[2]):
+        deal = tuple(tuple(int(n) for n in hand[:, g]) for hand in hands), tuple(int(n) for n in pile[:, g])
+        record = controller.play_game(seed=g, deal=deal)
+        winners.append(record.winner if record.winner is not None else BatchBluffController.UNFINISHED)
+    return winners
+
+
+class Cheater(BluffPlayer):
+    def take_turn_counts(self, counts, player_count, current_rank, current_bid):
+        return (4, 4, 4, 4)  # never held, so the player takes the pile and the bid has no cards
+
+
+class Challenger(BluffPlayer):
+    def take_turn_counts(self, counts, player_count, current_rank, current_bid):
+        return None
+
+
+class CheaterPolicy(BatchPolicy):
+    def take_turns(self, states):
+        return np.full_like(states.hands, 4)
+
+
+def test_illegal_challenge_rule_matches():
+    # Seat 0 cheats, so seat 1 challenges a bid of no cards, which both engines credit to seat 1
+    hands, pile = seeded_deals(50, seed=1)
+    batch = FixedDealController(hands, pile)
+    batch.join(CheaterPolicy())
+    batch.join(BatchPolicy())  # all-zero columns: always challenge
+    assert list(batch.play_batch(50, max_turns=10)) == [1] * 50
+    assert scalar_winners([Cheater(), Challenger()], hands, pile, max_turns=10) == [1] * 50
+
+
+def test_zero_order_games_match_deal_by_deal():
+    # ToM0 is deterministic, so both engines must play every deal to the same end
+    hands, pile = seeded_deals(300, seed=2)
+    batch = FixedDealController(hands, pile)
+    batch.join(BatchZeroOrderPolicy())
+    batch.join(BatchZeroOrderPolicy())
+    batch_winners = list(batch.play_batch(300, max_turns=200))
+    assert batch_winners == scalar_winners([ZeroOrderPlayer(), ZeroOrderPlayer()], hands, pile, max_turns=200)
+
+
+def test_seeded_win_rates_match():
+    # Random draws differ between the engines, so compare the win rates: same rules, same rate
+    max_turns = 2_000
+    scalar = BluffController(max_turns=max_turns)
+    scalar.join(RandomBluffPlayer())
+    scalar.join(ZeroOrderPlayer())
+    scalar_games = 1_000
+    scalar_score = scalar.repeated_games(scalar_games, seed=3)
+    batch = BatchBluffController()
+    batch.join(BatchRandomPolicy(np.random.default_rng(3)))
+    batch.join(BatchZeroOrderPolicy())
+    batch_games = 20_000
+    batch_winners = batch.play_batch(batch_games, seed=3, max_turns=max_turns)
+    p_scalar = scalar_score[0] / scalar_games
+    p_batch = float((batch_winners == 0).mean())
+    standard_error = sqrt(p_scalar * (1 - p_scalar) / scalar_games + p_batch * (1 - p_batch) / batch_games)
+    assert abs(p_scalar - p_batch) < 4 * standard_error
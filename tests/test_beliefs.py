@@ -0,0 +1,71 @@
+import random
+from collections import Counter
+
+import pytest
+
+from bluff import BluffBid
+from firstorderplayer import FirstOrderPlayer, tom0_bid_transition
+
+# Opponent bids (rank, count) that every hand the belief can reach is able to make
+BIDS = [("A", 2), ("J", 1), ("Q", 1)]
+MY_HAND = (3, 3, 1, 1)  # so the opponent starts with (1, 1, 3, 3)
+
+
+def observe(player: FirstOrderPlayer, rank: str, count: int) -> None:
+    player.observe_bid_counts(player.my_counts, 2, count, rank, 1, BluffBid(count, rank, 1))
+
+
+def exact_belief() -> dict:
+    player = FirstOrderPlayer()
+    player.exact_beliefs = True
+    player.start_game_counts(0, MY_HAND)
+    for rank, count in BIDS:
+        observe(player, rank, count)
+    return player.opp_belief
+
+
+def test_exact_belief_matches_sampled_average():
+    runs = 20_000
+    rng = random.Random(0)
+    seen = Counter()
+    for _ in range(runs):
+        player = FirstOrderPlayer()
+        player.rng = rng
+        player.start_game_counts(0, MY_HAND)
+        for rank, count in BIDS:
+            observe(player, rank, count)
+        seen[player.opp_counts] += 1
+    belief = exact_belief()
+    assert sum(belief.values()) == pytest.approx(1.0)
+    assert set(seen) == set(belief)
+    for hand, p in belief.items():
+        assert seen[hand] / runs == pytest.approx(p, abs=0.015)
+
+
+def test_bid_transition_rules_out_hands_that_cannot_bid():
+    # Two aces and one jack: ToM0 bluffs on a bid of 2 aces but has only one other card
+    assert tom0_bid_transition((2, 1, 0, 0), "A", 2) == ()
+    # Truthful bids take exactly those cards
+    assert tom0_bid_transition((3, 1, 0, 0), "A", 2) == (((1, 1, 0, 0), 1.0),)
+
+
+def test_exact_update_drops_impossible_hands_and_normalizes():
+    player = FirstOrderPlayer()
+    player.exact_beliefs = True
+    player.start_game_counts(0, (2, 2, 2, 2))
+    player.opp_belief = {(2, 1, 0, 0): 0.5, (0, 2, 1, 0): 0.5}
+    observe(player, "A", 2)
+    # Only the second hand can bluff two cards; two of its three non-aces leave
+    assert sum(player.opp_belief.values()) == pytest.approx(1.0)
+    assert all(hand[0] + hand[1] + hand[2] + hand[3] == 1 for hand in player.opp_belief)
+    assert all(hand[0] == 0 for hand in player.opp_belief)
+
+
+def test_exact_update_uses_the_bid_rank_not_the_controller_index():
+    player = FirstOrderPlayer()
+    player.exact_beliefs = True
+    player.start_game_counts(0, (2, 2, 2, 2))
+    bid = BluffBid(2, "A", 1)
+    # The controller passes the rank's index; the bid itself carries the letter
+    player.observe_bid_counts(player.my_counts, 2, 2, 0, 1, bid)
+    assert all(hand[0] == 2 for hand in player.opp_belief)
@@ -0,0 +1,27 @@
+import pytest
+
+from bluff import BluffController
+from events import ListSink
+from firstorderplayer import FirstOrderPlayer
+from randomplayer import RandomBluffPlayer
+
+
+def controller() -> BluffController:
+    controller = BluffController(max_turns=500)
+    controller.join(RandomBluffPlayer())
+    controller.join(FirstOrderPlayer())
+    return controller
+
+
+def test_parallel_games_refuse_an_attached_sink():
+    games = controller()
+    games.sink = ListSink()
+    with pytest.raises(ValueError):
+        games.repeated_games(10, workers=2, seed=0)
+    assert games.sink.events == []
+
+
+def test_parallel_games_equal_serial_games():
+    serial = controller().repeated_games(40, seed=11)
+    parallel_controller = controller()
+    assert parallel_controller.repeated_games(40, seed=11, workers=2) == serial
@@ -0,0 +1,86 @@
+import random
+
+from bluff import BluffController, GameState
+from events import ChallengeEvent, CheatEvent, DealEvent, ListSink, PlayEvent, WinEvent
+from firstorderplayer import FirstOrderPlayer
+from mctsplayer import ISMCTSPlayer
+from randomplayer import RandomBluffPlayer
+
+
+def snapshot(state: GameState) -> tuple:
+    return (state.position(), state.last_bid, state.turns, state.challenges, state.bluffs, state.winner)
+
+
+def test_copy_is_independent():
+    state = GameState([[2, 2, 2, 2], [2, 2, 2, 2]], [0, 0, 0, 0])
+    state.step((1, 0, 0, 1))
+    before = snapshot(state)
+    fork = state.copy()
+    assert snapshot(fork) == before
+    fork.step(None)  # challenge the bluff
+    fork.step((0, 1, 0, 0))
+    fork.hands[0][0] = 4
+    assert snapshot(state) == before
+    assert snapshot(fork) != before
+
+
+def test_step_replays_controller_games():
+    controller = BluffController(max_turns=500)
+    controller.join(RandomBluffPlayer())
+    controller.join(FirstOrderPlayer())
+    controller.sink = ListSink()
+    for seed in range(20):
+        controller.sink.events.clear()
+        record = controller.play_game(seed=seed)
+        state = None
+        attempted = None
+        for event in controller.sink.events:
+            if isinstance(event, DealEvent):
+                state = GameState([list(hand) for hand in event.hands], list(event.pile))
+            elif isinstance(event, CheatEvent):
+                attempted = event.attempted
+            elif isinstance(event, PlayEvent):
+                state.step(attempted if attempted is not None else event.cards)
+                attempted = None
+            elif isinstance(event, ChallengeEvent):
+                state.step(None)
+            elif isinstance(event, WinEvent) and event.reason == WinEvent.ILLEGAL_CHALLENGE:
+                state.step(None)
+        assert (state.winner, state.turns, state.challenges, state.bluffs) == (
+            record.winner, record.turns, record.challenges, record.bluffs
+        )
+
+
+def test_illegal_challenge_is_credited_to_the_challenger():
+    state = GameState([[2, 2, 2, 2], [2, 2, 2, 2]], [0, 0, 0, 0], current_player=1)
+    assert state.step(None) == (GameState.ILLEGAL_CHALLENGE, False, None)
+    assert state.winner == 1
+
+
+def test_cheat_takes_the_pile():
+    state = GameState([[2, 2, 2, 2], [2, 2, 2, 2]], [0, 0, 0, 0])
+    state.step((2, 0, 0, 0))
+    what, bluff, _ = state.step((0, 3, 0, 0))
+    assert what == GameState.CHEAT and not bluff
+    assert state.hands[1] == [4, 2, 2, 2] and state.pile == [0, 0, 0, 0]
+    assert state.last_bid.count == 0 and None not in state.actions()
+
+
+def test_ismcts_with_fixed_iterations_is_reproducible():
+    def play(seed: int):
+        controller = BluffController(max_turns=200)
+        controller.join(ISMCTSPlayer(iterations=30))
+        controller.join(RandomBluffPlayer())
+        controller.sink = ListSink()
+        controller.play_game(seed=seed)
+        return [event.to_dict() for event in controller.sink.events]
+
+    assert play(4) == play(4)
+
+
+def test_ismcts_card_api_plays_cards():
+    player = ISMCTSPlayer(iterations=30)
+    player.rng = random.Random(0)
+    player.start_game(0, ("A", "A", "J", "Q", "Q", "K", "K", "K"))
+    action = player.take_turn(("A", "A", "J", "Q", "Q", "K", "K", "K"), 2, "A", None)
+    assert action and all(card in "AJQK" for card in action)
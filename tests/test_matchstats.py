@@ -0,0 +1,56 @@
+from math import inf, sqrt
+from statistics import mean, variance
+
+import pytest
+
+from bluff import BluffController, GameRecord
+from matchstats import PairedStats, z_score
+from randomplayer import RandomBluffPlayer
+from zeroorderplayer import ZeroOrderPlayer
+
+
+def mirrored(first_winner: int | None, second_winner: int | None) -> tuple[GameRecord, GameRecord]:
+    """A deal played with seats (0, 1) and then (1, 0); winners are seats."""
+    records = []
+    for seats, winner in (((0, 1), first_winner), ((1, 0), second_winner)):
+        record = GameRecord(winner, 10, 1, 1, aborted=None if winner is not None else GameRecord.MAX_TURNS)
+        record.seats = seats
+        records.append(record)
+    return tuple(records)
+
+
+def test_paired_stats_math():
+    deals = [mirrored(0, 0), mirrored(0, 1), mirrored(1, None), mirrored(0, 1)]
+    differences = [0, 2, -1, 2]  # wins of joined player 0 minus wins of player 1, per deal
+    outcomes = [1, -1, 1, 1, -1, 0, 1, 1]  # per game, from player 0's side; 0 for the aborted game
+    stats = PairedStats()
+    for deal in deals:
+        stats.add(deal)
+    assert (stats.deals, stats.games, stats.aborted, stats.wins) == (4, 8, 1, [5, 2])
+    assert stats.win_rate(0) == pytest.approx(5 / 7)
+    assert stats.mean_difference == pytest.approx(mean(differences))
+    assert stats.difference_variance == pytest.approx(variance(differences))
+    assert stats.standard_error() == pytest.approx(sqrt(variance(differences) / 4))
+    low, high = stats.confidence_interval(0.95)
+    assert (low, high) == pytest.approx((0.75 - z_score(0.95) * stats.standard_error(), 0.75 + z_score(0.95) * stats.standard_error()))
+    assert stats.variance_reduction() == pytest.approx(variance(outcomes) * 2 / variance(differences))
+
+
+def test_identical_deals_remove_all_variance():
+    stats = PairedStats()
+    for _ in range(3):
+        stats.add(mirrored(0, 0))
+    assert stats.difference_variance == 0.0
+    assert stats.variance_reduction() == inf
+
+
+def test_parallel_paired_games_equal_serial_games():
+    def controller() -> BluffController:
+        controller = BluffController(max_turns=500)
+        controller.join(RandomBluffPlayer())
+        controller.join(ZeroOrderPlayer())
+        return controller
+
+    serial = controller().repeated_games(20, seed=5, paired=True)
+    assert sum(serial) > 20  # two games per deal
+    assert controller().repeated_games(20, seed=5, paired=True, workers=2) == serial
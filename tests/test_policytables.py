@@ -0,0 +1,40 @@
+import pytest
+
+from bluff import BluffController
+from events import ListSink
+from firstorderplayer import FirstOrderPlayer
+from policytables import PolicyTables, TableFirstOrderPlayer, TableZeroOrderPlayer, check_tables, write_tables
+from randomplayer import RandomBluffPlayer
+from zeroorderplayer import ZeroOrderPlayer
+
+
+@pytest.fixture(scope="module")
+def tables_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("tables") / "policy_tables.bin")
+    write_tables(path)
+    return path
+
+
+def test_tables_match_live_kernels(tables_path):
+    tables = PolicyTables(tables_path)
+    try:
+        assert check_tables(tables) == []
+    finally:
+        tables.close()
+
+
+def game_events(players, seed: int) -> list[dict]:
+    controller = BluffController(max_turns=500)
+    for player in players:
+        controller.join(player)
+    controller.sink = ListSink()
+    controller.play_game(seed=seed)
+    return [event.to_dict() for event in controller.sink.events]
+
+
+@pytest.mark.parametrize("live, table", [(ZeroOrderPlayer, TableZeroOrderPlayer), (FirstOrderPlayer, TableFirstOrderPlayer)])
+def test_table_agents_play_the_same_games(tables_path, live, table):
+    for seed in range(30):
+        table_player = table()
+        table_player.tables_path = tables_path
+        assert game_events([table_player, RandomBluffPlayer()], seed) == game_events([live(), RandomBluffPlayer()], seed)
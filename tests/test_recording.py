@@ -0,0 +1,107 @@
+import pytest
+
+from bluff import BluffController, BluffPlayer
+from firstorderplayer import FirstOrderPlayer
+from randomplayer import RandomBluffPlayer
+from recording import CHEAT, GameRecorder, RecordFile, replay_with_agents
+from zeroorderplayer import ZeroOrderPlayer
+
+DEAL = (((2, 2, 2, 2), (1, 1, 2, 4)), (1, 1, 0, 2))
+
+
+def controller(max_turns: int = 300) -> BluffController:
+    controller = BluffController(max_turns=max_turns)
+    controller.join(RandomBluffPlayer())
+    controller.join(FirstOrderPlayer())
+    return controller
+
+
+def record_games(path: str, controller: BluffController) -> list:
+    """Plays plain, rotated and explicitly dealt games into `path`; returns their GameRecords."""
+    recorder = GameRecorder(path, buffer_size=7)
+    controller.sink = recorder
+    records = [controller.play_game(seed=seed) for seed in range(10)]
+    for seed in range(10, 15):
+        records.extend(controller.play_rotated(seed))
+    records.extend(controller.play_game(seed=seed, deal=DEAL, seats=[1, 0]) for seed in range(5))
+    recorder.close()
+    controller.sink = None
+    return records
+
+
+def test_records_round_trip(tmp_path):
+    path = str(tmp_path / "games.bin")
+    records = record_games(path, controller())
+    with RecordFile(path) as games:
+        assert len(games) == len(records)
+        for record, game in zip(records, games):
+            assert (game.seed, game.winner, game.turns, game.aborted) == (record.seed, record.winner, record.turns, record.aborted)
+            assert game.seats == record.seats
+            state = game.state_at()
+            assert (state.winner, state.turns) == (game.winner, game.turns)
+        assert games[-1].dealt and games[-1].deal == DEAL
+
+
+def test_replay_reproduces_every_game(tmp_path):
+    path = str(tmp_path / "games.bin")
+    replaying = controller()
+    record_games(path, replaying)
+    with RecordFile(path) as games:
+        for game in games:
+            record = replay_with_agents(replaying, game)
+            assert (record.winner, record.turns, record.seats) == (game.winner, game.turns, game.seats)
+
+
+def test_aborted_games_are_recorded(tmp_path):
+    path = str(tmp_path / "games.bin")
+    looping = BluffController(max_turns=20)
+    looping.join(ZeroOrderPlayer())
+    looping.join(ZeroOrderPlayer())
+    looping.sink = GameRecorder(path)
+    records = [looping.play_game(seed=seed) for seed in range(20)]
+    looping.sink.close()
+    looping.sink = None
+    with RecordFile(path) as games:
+        assert [game.aborted for game in games] == [record.aborted for record in records]
+        assert any(game.aborted for game in games)
+        for game in games:
+            assert replay_with_agents(looping, game).aborted == game.aborted
+            assert game.state_at().winner == game.winner
+
+
+def test_cheats_and_illegal_challenges_replay_without_agents(tmp_path):
+    # Seat 0 always cheats and seat 1 always challenges, so every game ends in an illegal challenge
+    path = str(tmp_path / "games.bin")
+    games = BluffController(max_turns=50)
+    games.join(Cheater())
+    games.join(Challenger())
+    games.sink = GameRecorder(path)
+    records = [games.play_game(seed=seed) for seed in range(5)]
+    games.sink.close()
+    with RecordFile(path) as stored:
+        for record, game in zip(records, stored):
+            state = game.state_at()
+            assert (state.winner, state.turns, state.challenges) == (record.winner, record.turns, record.challenges)
+            assert game.actions()[0] == CHEAT
+
+
+class Cheater(BluffPlayer):
+    def take_turn_counts(self, counts, player_count, current_rank, current_bid):
+        return (4, 4, 4, 4)
+
+
+class Challenger(BluffPlayer):
+    def take_turn_counts(self, counts, player_count, current_rank, current_bid):
+        return None
+
+
+def test_replay_with_other_agents_is_detected(tmp_path):
+    path = str(tmp_path / "games.bin")
+    record_games(path, controller())
+    other = BluffController(max_turns=300)
+    other.join(ZeroOrderPlayer())
+    other.join(FirstOrderPlayer())
+    with RecordFile(path) as games:
+        with pytest.raises(ValueError):
+            for game in games:
+                replay_with_agents(other, game)
@@ -0,0 +1,40 @@
+import random
+
+from bluff import BluffBid
+from firstorderplayer import tom1_decision
+from theoryofmind import TheoryOfMindPlayer, tomk_decision, tomk_would_bluff
+
+
+def test_level_one_bidder_can_be_truthful():
+    # The opponent holds all four aces: claiming four aces is safe, bluffing them is not
+    assert not tomk_would_bluff(1, (4, 0, 2, 2), (0, 4, 2, 2), "A", 4, 4)
+
+
+def test_level_two_model_predicts_a_truthful_bid():
+    player = TheoryOfMindPlayer(order=2)
+    player.start_game_counts(0, (0, 4, 2, 2))
+    # The controller passes the rank's index (0); the bid carries the letter
+    player.observe_bid_counts((0, 4, 2, 2), 2, 4, 0, 1, BluffBid(4, "A", 1))
+    # Predicted truthful, so the four aces left the opponent's hand and nothing else did
+    assert player.opp_counts == (0, 0, 2, 2)
+
+
+def test_bid_without_cards_is_observed():
+    # A cheat shows up as a bid of 0 cards; the rank index used to reach the kernels and raise KeyError
+    player = TheoryOfMindPlayer(order=3)
+    player.start_game_counts(0, (2, 2, 2, 2))
+    player.observe_bid_counts((2, 2, 2, 2), 2, 0, 1, 1, BluffBid(0, "J", 1))
+    assert sum(player.opp_counts) == 8
+
+
+def test_level_one_decision_is_tom1():
+    rng = random.Random(0)
+    for _ in range(3000):
+        hand = tuple(rng.randint(0, 4) for _ in range(4))
+        if not any(hand):
+            continue
+        model = tuple(rng.randint(0, 4 - n) for n in hand)  # the opponent holds some of the other cards
+        rank = rng.choice("AJQK")
+        bid = rng.choice([None, *range(0, 9)])
+        pile = rng.randint(0, 16)
+        assert tomk_decision(1, hand, model, rank, bid, pile) == tom1_decision(hand, model, rank, bid, pile)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+from bluff import BluffBid, Counts, RANK_INDEX
+from firstorderplayer import FirstOrderPlayer, tom1_ev_play
+from zeroorderplayer import CHALLENGE_THRESHOLD, tom0_action, tom0_challenge_probability, tom0_would_bluff
+
+# ToM-k kernels for any order k. A level-k agent holds `hand`, keeps `model` as its guess of the
+# opponent's hand and assumes that opponent reasons at level k-1 (with the roles of hand and
+# model swapped). Level 0 is the ToM0 kernel; level 1 is exactly the ToM1 kernel of firstorderplayer.py.
+#
+# Every question goes through one memo table (_tomk), keyed on (question, level, hand, model, rank,
+# bid, pile). The best play of a level does not depend on the bid it answers, so each level asks
+# for it once per position and the levels below are shared by every bid above them: a ToM-k
+# decision costs O(k) best-play evaluations instead of O(plays^k).
+TOMK_CACHE_SIZE = 1 << 18
+
+BLUFF = "bluff"  # would a level-j bidder holding `hand` have bluffed this bid?
+CHALLENGE = "challenge"  # would a level-j agent holding `hand` challenge this bid?
+BEST_PLAY = "best_play"  # ((is_bluff, k), ev) of the level-j agent's best play
+
+
+@lru_cache(maxsize=TOMK_CACHE_SIZE)
+def _tomk(question: str, level: int, hand: Counts, model: Counts, current_rank: str, bid_count: int, pile_size: int):
+    if question == BLUFF:
+        if level == 0:
+            return tom0_would_bluff(hand, current_rank, bid_count)
+        # If I cannot truthfully play k cards, it must be a bluff
+        if bid_count > hand[RANK_INDEX[current_rank]]:
+            return True
+        ev_bluff = tomk_ev_play(level, hand, model, current_rank, bid_count, True, pile_size)
+        ev_truth = tomk_ev_play(level, hand, model, current_rank, bid_count, False, pile_size)
+        return ev_bluff >= ev_truth
+
+    if question == CHALLENGE:
+        if level == 0:
+            return tom0_challenge_probability(hand, current_rank, bid_count) >= CHALLENGE_THRESHOLD
+        ev_chal = tomk_ev_challenge(level, model, hand, current_rank, bid_count, pile_size)
+        return ev_chal >= tomk_best_play(level, hand, model, current_rank, pile_size)[1]
+
+    # BEST_PLAY; bluffs are considered first, so ties go to bluffing (as in tom1_best_play)
+    r = RANK_INDEX[current_rank]
+    n_truth = hand[r]
+    n_bluff = sum(hand) - n_truth
+    choice: dict[tuple[bool, int], float] = {}
+    for k in range(1, n_bluff + 1):
+        choice[(True, k)] = tomk_ev_play(level, hand, model, current_rank, k, True, pile_size)
+    for k in range(1, n_truth + 1):
+        choice[(False, k)] = tomk_ev_play(level, hand, model, current_rank, k, False, pile_size)
+    if not choice:
+        # No cards left (that player has already won); anything beats not being able to play
+        return None, float("-inf")
+    best_action = max(choice, key=choice.get)  # type: ignore
+    return best_action, choice[best_action]
+
+
+def tomk_ev_play(
+    level: int, hand: Counts, model: Counts, current_rank: str, bid_count: int, i_will_bluff: bool, pile_size: int
+) -> float:
+    """EV of bidding bid_count cards for a level-`level` agent (level >= 1)."""
+    if level == 1:
+        return tom1_ev_play(hand, current_rank, bid_count, i_will_bluff, pile_size)
+    # The level-1 opponent holds what I think it holds, and thinks I hold my hand
+    if _tomk(CHALLENGE, level - 1, model, hand, current_rank, bid_count, pile_size):
+        return float(-pile_size) if i_will_bluff else float(pile_size)
+    return float(bid_count)
+
+
+def tomk_ev_challenge(
+    level: int, opponent_counts: Counts, my_counts: Counts, current_rank: str, bid_count: int | None, pile_size: int
+) -> float:
+    """EV of challenging the opponent's bid for a level-`level` agent that models the opponent as level-1."""
+    if bid_count is None:
+        return 0.0
+    if tomk_would_bluff(level - 1, opponent_counts, my_counts, current_rank, bid_count, pile_size):
+        return float(pile_size)
+    return float(-pile_size)
+
+
+def tomk_would_bluff(
+    level: int, hand: Counts, model: Counts, current_rank: str, bid_count: int, pile_size: int
+) -> bool:
+    return _tomk(BLUFF, level, hand, model, current_rank, bid_count, pile_size)
+
+
+def tomk_would_challenge(
+    level: int, hand: Counts, model: Counts, current_rank: str, bid_count: int, pile_size: int
+) -> bool:
+    return _tomk(CHALLENGE, level, hand, model, current_rank, bid_count, pile_size)
+
+
+def tomk_best_play(
+    level: int, hand: Counts, model: Counts, current_rank: str, pile_size: int
+) -> tuple[tuple[bool, int] | None, float]:
+    return _tomk(BEST_PLAY, level, hand, model, current_rank, 0, pile_size)
+
+
+def tomk_decision(
+    level: int, hand: Counts, model: Counts, current_rank: str, bid_count: int | None, pile_size: int
+) -> tuple[bool, int] | None:
+    """
+    The ToM-k move (level >= 1): None to challenge, otherwise (is_bluff, k). Equal to tom1_decision for level 1.
+    """
+    best_action, best_ev = tomk_best_play(level, hand, model, current_rank, pile_size)
+    ev_chal = tomk_ev_challenge(level, model, hand, current_rank, bid_count, pile_size)
+    if ev_chal >= best_ev:
+        return None
+    return best_action
+
+
+def tomk_cache_info():
+    """Hit/miss statistics of the shared ToM-k memo table (a functools _CacheInfo)."""
+    return _tomk.cache_info()
+
+
+def tomk_cache_clear() -> None:
+    _tomk.cache_clear()
+
+
+class TheoryOfMindPlayer(FirstOrderPlayer):
+    """
+    ToM-k agent for any order k: TheoryOfMindPlayer(order=3), or a subclass setting `order`
+    (the tournament code instantiates agent classes without arguments).
+    Order 0 plays as ZeroOrderPlayer and order 1 as FirstOrderPlayer (exact_beliefs included). For
+    higher orders the opponent model is FirstOrderPlayer's sampled opp_counts, updated with the
+    level k-1 bluff prediction; exact_beliefs there still pushes the belief through the ToM0 model.
+    """
+
+    order = 2
+
+    def __init__(self, order: int | None = None):
+        if order is not None:
+            self.order = order
+
+    def observe_bid_counts(self, counts: Counts, player_count: int, challenge_amount_of_cards: int, current_rank: str, bidder_id: int, current_bid: BluffBid | None) -> None:
+        if self.order >= 2 and current_bid is not None:
+            # The ToM-k kernels need the rank letter; the controller passes observe_* the rank's index
+            current_rank = current_bid.rank
+        super().observe_bid_counts(counts, player_count, challenge_amount_of_cards, current_rank, bidder_id, current_bid)
+
+    def _opponent_would_bluff(self, current_rank: str, bid_count: int) -> bool:
+        if self.order <= 1:
+            return super()._opponent_would_bluff(current_rank, bid_count)
+        return tomk_would_bluff(self.order - 1, self.opp_counts, self.my_counts, current_rank, bid_count, self.pile_size)
+
+    def _tom1_decision(self, counts: Counts, current_rank: str, bid_count: int | None) -> tuple[bool, int] | None:
+        if self.order == 1:
+            return super()._tom1_decision(counts, current_rank, bid_count)
+        return tomk_decision(self.order, counts, self.opp_counts, current_rank, bid_count, self.pile_size)
+
+    def take_turn_counts(self, counts: Counts, player_count: int, current_rank: str, current_bid: BluffBid | None) -> Counts | None:
+        if self.order == 0:
+            bid_count = current_bid.count if current_bid is not None else None
+            return tom0_action(counts, current_rank, bid_count)
+        return super().take_turn_counts(counts, player_count, current_rank, current_bid)
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import othersecondorder
+from bluff import BluffController, BluffPlayer
+from firstorderplayer import FirstOrderPlayer
+from matchstats import wilson_interval
+from randomplayer import RandomBluffPlayer
+from secondorderplayer import SecondOrderPlayer
+from zeroorderplayer import ZeroOrderPlayer
+
+DEFAULT_AGENTS: list[type[BluffPlayer]] = [
+    RandomBluffPlayer,
+    ZeroOrderPlayer,
+    FirstOrderPlayer,
+    SecondOrderPlayer,
+    othersecondorder.SecondOrderPlayer,
+]
+
+
+def check_game_limits(max_turns: int | None, time_limit: float | None) -> None:
+    """Tournaments need a game limit: ZeroOrderPlayer against either SecondOrderPlayer can loop forever."""
+    if max_turns is None and time_limit is None:
+        raise ValueError("set max_turns or time_limit; some pairings never finish without a limit")
+
+
+def agent_name(agent: type[BluffPlayer]) -> str:
+    # Both SecondOrderPlayer variants share a class name, so include the module
+    return f"{agent.__module__}.{agent.__name__}"
+
+
+class TournamentResult:
+    """
+    Win counts of a round robin: wins[i][j] is how often agent i beat agent j, out of games[i][j] games
+    (counting both seatings). Games the controller aborted are only counted in aborted[i][j].
+    """
+
+    def __init__(self, agents: list[type[BluffPlayer]]):
+        self.agents = agents
+        self.names = [agent_name(agent) for agent in agents]
+        self.wins = [[0 for _ in agents] for _ in agents]
+        self.games = [[0 for _ in agents] for _ in agents]
+        self.aborted = [[0 for _ in agents] for _ in agents]
+
+    def add(self, first: int, second: int, score: list[int], aborted: int = 0) -> None:
+        """Adds the score of games with agent `first` in seat 0 and agent `second` in seat 1."""
+        games = score[0] + score[1]
+        self.wins[first][second] += score[0]
+        self.wins[second][first] += score[1]
+        self.games[first][second] += games
+        self.games[second][first] += games
+        self.aborted[first][second] += aborted
+        self.aborted[second][first] += aborted
+
+    def win_rate(self, i: int, j: int) -> float:
+        return self.wins[i][j] / self.games[i][j] if self.games[i][j] else 0.5
+
+    def interval(self, i: int, j: int, confidence: float = 0.95) -> tuple[float, float]:
+        return wilson_interval(self.wins[i][j], self.games[i][j], confidence)
+
+    def half_width(self, i: int, j: int, confidence: float = 0.95) -> float:
+        low, high = self.interval(i, j, confidence)
+        return (high - low) / 2
+
+    def win_rate_matrix(self) -> list[list[float]]:
+        return [[self.win_rate(i, j) for j in range(len(self.agents))] for i in range(len(self.agents))]
+
+    def __str__(self) -> str:
+        width = max(len(name) for name in self.names)
+        lines = ["win rate of row vs column (95% CI half-width)"]
+        for i, name in enumerate(self.names):
+            cells = []
+            for j in range(len(self.agents)):
+                if i == j:
+                    cells.append(f"{'-':^11}")
+                else:
+                    cells.append(f"{self.win_rate(i, j):.3f}±{self.half_width(i, j):.3f}")
+            lines.append(f"{name:<{width}}  " + "  ".join(cells))
+        aborted = sum(map(sum, self.aborted)) // 2
+        if aborted:
+            lines.append(f"{aborted} games aborted without a winner")
+        return "\n".join(lines)
+
+
+def play_matchup(
+    first: type[BluffPlayer],
+    second: type[BluffPlayer],
+    number_of_games: int,
+    seed: int,
+    max_turns: int | None = 10_000,
+    time_limit: float | None = None,
+) -> tuple[list[int], int]:
+    """
+    Plays number_of_games games with fresh agents, `first` in seat 0. Runs in a worker process.
+    Returns the score and the number of aborted games (see BluffController for the limits).
+    """
+    controller = BluffController(max_turns=max_turns, time_limit=time_limit)
+    controller.join(first())
+    controller.join(second())
+    score = controller.repeated_games(number_of_games, seed=seed)
+    return score, sum(controller.aborted.values())
+
+
+def matchup_tasks(pairs, games_per_pairing: int, chunk_size: int, seeder: random.Random):
+    """
+    Splits every pairing into chunks of at most chunk_size games, half of them with each agent in seat 0.
+    Yields (first, second, number_of_games, seed).
+    """
+    for i, j in pairs:
+        for first, second, games in ((i, j, (games_per_pairing + 1) // 2), (j, i, games_per_pairing // 2)):
+            while games > 0:
+                chunk = min(chunk_size, games)
+                yield first, second, chunk, seeder.getrandbits(64)
+                games -= chunk
+
+
+def round_robin(
+    agents: list[type[BluffPlayer]] | None = None,
+    games_per_pairing: int = 1000,
+    *,
+    workers: int | None = None,
+    seed: int | None = None,
+    chunk_size: int = 50,
+    max_turns: int | None = 10_000,
+    time_limit: float | None = None,
+) -> TournamentResult:
+    """
+    Plays every pairing of `agents` with seat rotation and returns the win-rate matrix.
+    All chunks of all pairings go into one process pool (workers=None uses every core), so the
+    wall time depends on the total number of games and the number of cores, not on the number of pairings.
+    Games longer than max_turns turns or time_limit seconds are aborted, so pairings that can
+    loop forever (ZeroOrderPlayer against either SecondOrderPlayer) still finish; turning off
+    both limits raises ValueError.
+    """
+    check_game_limits(max_turns, time_limit)
+    agents = list(agents or DEFAULT_AGENTS)
+    result = TournamentResult(agents)
+    pairs = [(i, j) for i in range(len(agents)) for j in range(i + 1, len(agents))]
+    seeder = random.Random(seed)
+    tasks = list(matchup_tasks(pairs, games_per_pairing, chunk_size, seeder))
+    workers = workers or os.cpu_count() or 1
+    # Longest-first would need game-length estimates; shuffling at least spreads slow pairings over workers
+    seeder.shuffle(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                play_matchup, agents[first], agents[second], games, task_seed, max_turns, time_limit
+            ): (first, second)
+            for first, second, games, task_seed in tasks
+        }
+        for future in as_completed(futures):
+            first, second = futures[future]
+            result.add(first, second, *future.result())
+    return result
+
+
+def adaptive_round_robin(
+    agents: list[type[BluffPlayer]] | None = None,
+    total_games: int = 10_000,
+    *,
+    batch_size: int = 50,
+    workers: int | None = None,
+    seed: int | None = None,
+    confidence: float = 0.95,
+    max_turns: int | None = 10_000,
+    time_limit: float | None = None,
+) -> TournamentResult:
+    """
+    Round robin under a fixed total game budget. After one batch per pairing, every next batch
+    goes to the pairing whose win-rate interval is widest (counting batches still in flight as if
+    they were already played at the current win rate). Lopsided pairings settle after a batch or two
+    and close ones get the rest, so all intervals end up about equally wide.
+    Seats alternate from batch to batch within a pairing. max_turns and time_limit work as in round_robin
+    (one of them is required); aborted games use up the budget and count as played when choosing the next pairing.
+    """
+    check_game_limits(max_turns, time_limit)
+    agents = list(agents or DEFAULT_AGENTS)
+    result = TournamentResult(agents)
+    pairs = [(i, j) for i in range(len(agents)) for j in range(i + 1, len(agents))]
+    seeder = random.Random(seed)
+    workers = workers or os.cpu_count() or 1
+    in_flight = {pair: 0 for pair in pairs}
+    batches = {pair: 0 for pair in pairs}
+    budget = total_games
+
+    def projected_half_width(pair: tuple[int, int]) -> float:
+        i, j = pair
+        # Aborted games and batches in flight count as played at the current win rate. Aborted games
+        # do not narrow the real interval, but without them a pairing that always loops would get the whole budget
+        games = result.games[i][j] + result.aborted[i][j] + in_flight[pair]
+        wins = round(result.win_rate(i, j) * games)
+        low, high = wilson_interval(wins, games, confidence)
+        return (high - low) / 2
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def submit(pair: tuple[int, int]) -> None:
+            nonlocal budget
+            games = min(batch_size, budget)
+            budget -= games
+            first, second = pair if batches[pair] % 2 == 0 else pair[::-1]
+            batches[pair] += 1
+            in_flight[pair] += games
+            future = pool.submit(
+                play_matchup, agents[first], agents[second], games, seeder.getrandbits(64), max_turns, time_limit
+            )
+            pending[future] = (pair, first, second, games)
+
+        for pair in pairs:
+            if budget > 0:
+                submit(pair)
+        # Keep a couple of batches per worker queued so no core waits on the scheduler
+        while pending:
+            while budget > 0 and len(pending) < 2 * workers:
+                submit(max(pairs, key=projected_half_width))
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pair, first, second, games = pending.pop(future)
+                in_flight[pair] -= games
+                result.add(first, second, *future.result())
+    return result
+
+
+if __name__ == "__main__":
+    print(round_robin(games_per_pairing=200, seed=0))
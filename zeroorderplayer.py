@@ -1,7 +1,109 @@
-from bluff import BluffBid, BluffPlayer
+from bluff import BluffBid, BluffPlayer, Counts, RANK_INDEX, RANKS, cards_to_counts, counts_to_cards
+from functools import lru_cache
 from math import comb
 
+
+@lru_cache(maxsize=None)
+def challenge_probability_table(deck_size: int = 16, rank_copies: int = 4) -> tuple[tuple[tuple[float, ...], ...], ...]:
+    """
+    table[hand_size][my_count][k] is the probability that a bid of k cards of a rank is a bluff,
+    for a player holding hand_size cards of which my_count are of that rank, when the other
+    deck_size - hand_size cards are unseen and every rank has rank_copies cards.
+    Built once per deck shape; bids larger than the table are always bluffs.
+    """
+    table = []
+    for hand_size in range(deck_size + 1):
+        N_opp = deck_size - hand_size
+        by_count = []
+        for my_count in range(rank_copies + 1):
+            N_star = max(0, min(rank_copies - my_count, N_opp))  # maximum opponent rank cards
+            by_k = []
+            for k in range(deck_size + 1):
+                if k > N_star:
+                    by_k.append(1.0)    # Hard impossibility
+                else:
+                    by_k.append(1.0 - comb(N_star, k) / comb(N_opp, k))  # Hypergeometric probability
+            by_count.append(tuple(by_k))
+        table.append(tuple(by_count))
+    return tuple(table)
+
+
+# ToM0 policy kernels. Pure functions of explicit state (rank counts instead of card tuples,
+# the bid count instead of a BluffBid, None meaning "no bid"), so higher-order agents can call
+# them without building a ZeroOrderPlayer. The ZeroOrderPlayer methods below are wrappers.
+CHALLENGE_THRESHOLD = 0.75  #designer choice (need to explain)
+
+
+def tom0_would_bluff(counts: Counts, current_rank: str, bid_count: int | None) -> bool:
+    """
+    Returns True iff, given these cards, a ToM0 agent would be bluffing
+    when making a bid of bid_count cards.
+    """
+    # how many rank-r cards ToM0 has (a rank that is not a card letter matches no card)
+    r = RANK_INDEX.get(current_rank)  # type: ignore
+    r_count = counts[r] if r is not None else 0
+
+    # If bid claims more rank-r cards than ToM0 could truthfully play,
+    # then it must be a bluff
+    if bid_count is not None and bid_count > r_count: #Should he not challenge here?
+        return True
+
+    # Otherwise, follow ToM0 policy: ToM0 wants to bluff iff r_count < 3
+    return r_count < 3
+
+
+def tom0_challenge_probability(
+    counts: Counts, current_rank: str, bid_count: int | None, deck_size: int = 16, rank_copies: int = 4
+) -> float:
+    """
+    Probability that a bid of bid_count cards of current_rank is a bluff, seen from this hand.
+    """
+    #if incoming cards + the cards in this agent's hand higher than 4, challenge NOTE: in a 3+ player game you would have to keep track of previously played
+    # cards to see if that exceeds 4 -> Tom0 agent w/ explicit memory
+
+    # Defensive fix: convert rank index to rank character
+    if isinstance(current_rank, int):
+        current_rank = RANKS[current_rank]
+    if bid_count is None:
+        return 0.0  #dont challenge on the first round
+
+    my_count = counts[RANK_INDEX[current_rank]]          # N_i^R
+    N_agent = sum(counts)
+
+    by_k = challenge_probability_table(deck_size, rank_copies)[N_agent][my_count]
+    if bid_count >= len(by_k):
+        return 1.0
+    return by_k[bid_count]
+
+
+def tom0_action(
+    counts: Counts, current_rank: str, bid_count: int | None, deck_size: int = 16, rank_copies: int = 4
+) -> Counts | None:
+    """
+    The ToM0 move: None to challenge, otherwise the rank counts of the cards to play.
+    """
+    if bid_count is not None:
+        if tom0_challenge_probability(counts, current_rank, bid_count, deck_size, rank_copies) >= CHALLENGE_THRESHOLD:
+            return None     #challenge if high chance to win
+
+    # Truthful play: every card of the current rank. Bluff: every other card.
+    r = RANK_INDEX[current_rank]
+    n_truth = counts[r]
+    n_bluff = sum(counts) - n_truth
+
+    want_to_bluff = n_truth < 3
+
+    if (want_to_bluff and n_bluff) or not n_truth:
+        return tuple(0 if i == r else n for i, n in enumerate(counts))
+    else:
+        return tuple(n_truth if i == r else 0 for i in range(4))
+
+
 class ZeroOrderPlayer(BluffPlayer):
+    deck_size = 16
+    rank_copies = 4
+    deterministic = True
+
     def tom0_would_bluff(
         self,
         cards: tuple[str],
@@ -12,63 +114,26 @@ class ZeroOrderPlayer(BluffPlayer):
         Returns True iff, given these cards, a ToM0 agent would be bluffing
         when making this bid.
         """
-        # how many rank-r cards ToM0 has
-        r_count = cards.count(current_rank)
-
-        # ToM0 wants to bluff iff r_count < 3
-        want_to_bluff = r_count < 3
-
-        # If bid claims more rank-r cards than ToM0 could truthfully play,
-        # then it must be a bluff
-        if bid is not None and bid.count > r_count: #Should he not challenge here? 
-            return True
-
-        # Otherwise, follow ToM0 policy
-        return want_to_bluff
+        return self.tom0_would_bluff_counts(cards_to_counts(cards), current_rank, bid)
 
+    def tom0_would_bluff_counts(self, counts: Counts, current_rank: str, bid: BluffBid) -> bool:
+        return tom0_would_bluff(counts, current_rank, bid.count if bid is not None else None)
 
     def calculate_challenge_probability(
         self, cards: tuple[str], player_count: int, current_rank: str, current_bid: BluffBid) -> float:
-        #if incoming cards + the cards in this agent's hand higher than 4, challenge NOTE: in a 3+ player game you would have to keep track of previously played 
-        # cards to see if that exceeds 4 -> Tom0 agent w/ explicit memory
-        
-        # Defensive fix: convert rank index to rank character
-        if isinstance(current_rank, int):
-            current_rank = "AJQK"[current_rank]
-        if current_bid is None:
-            return 0.0  #dont challenge on the first round
-        k = current_bid.count
-
-        my_count = cards.count(current_rank)                 # N_i^R
-
-        N_R = 4
-        N_agent = len(cards)
-        N_opp = 16 - N_agent                                    # 2-player assumption
-
-        N_star = min(N_R - my_count, N_opp)            # maximum opponent rank cards
-
-        # Hard impossibility
-        if k > N_star:
-            return 1.0
-
-        # Hypergeometric probability
-        p_truth = comb(N_star, k) / comb(N_opp, k)
-        return 1.0 - p_truth
+        return self.calculate_challenge_probability_counts(cards_to_counts(cards), player_count, current_rank, current_bid)
 
+    def calculate_challenge_probability_counts(
+        self, counts: Counts, player_count: int, current_rank: str, current_bid: BluffBid) -> float:
+        bid_count = current_bid.count if current_bid is not None else None
+        return tom0_challenge_probability(counts, current_rank, bid_count, self.deck_size, self.rank_copies)
 
     def take_turn(self, cards: tuple[str], player_count: int, current_rank: str, current_bid: BluffBid) -> list[str] | None:
-        if current_bid is not None:    
-            if self.calculate_challenge_probability(cards, player_count, current_rank, current_bid) >= 0.75:    #designer choice (need to explain)
-                return None     #challenge if high chance to win
-            
-        truth_cards = [p for p in cards if all(c == current_rank for c in p)] #PROBEER 1 KAART TE PAKKEN VOOR SIMPLICITY
-        bluff_cards = [p for p in cards if all(c != current_rank for c in p)]
-        
-        want_to_bluff = cards.count(current_rank) < 3      #I don't know if adding 'self' here so the tom1 agent can access it will break the code       
-        
-        if (want_to_bluff and bluff_cards) or not truth_cards:
-            return bluff_cards
-        else:
-            return truth_cards
-
-        
+        action = self.take_turn_counts(cards_to_counts(cards), player_count, current_rank, current_bid)
+        if action is None:
+            return None
+        return list(counts_to_cards(action))
+
+    def take_turn_counts(self, counts: Counts, player_count: int, current_rank: str, current_bid: BluffBid | None) -> Counts | None:
+        bid_count = current_bid.count if current_bid is not None else None
+        return tom0_action(counts, current_rank, bid_count, self.deck_size, self.rank_copies)